@@ -0,0 +1,186 @@
+"""Benchmarks the solvers on a fixed, seeded corpus of boards.
+
+    python benchmark.py --out results.json
+    python benchmark.py --sweep --timeout 30 --out sweep.json
+
+Every solve runs in its own process, so a search that blows up can be timed out and killed, and
+the peak resident memory reported belongs to that solve alone.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import solver
+
+DEFAULT_SIZES = (8, 12, 16, 22)
+DEFAULT_PAWNS = (2, 4, 6, 8)
+DEFAULT_ALGORITHMS = (solver.BFS, solver.DFS, solver.ASTAR)
+SWEEP_SIZES = (8, 12, 16, 22, 30, 40, 60, 80, 100)
+SWEEP_PAWNS = (2, 4, 8, 12, 16, 24, 32)
+# The algorithms that take a heuristic option
+HEURISTIC_ALGORITHMS = (solver.ASTAR, solver.IDASTAR, solver.HDASTAR, solver.ANYTIME, solver.BEAM)
+
+
+def build_corpus(sizes, pawn_counts, boards_per_case, seed=0):
+    """The same list of puzzles for the same arguments, on every machine and every commit"""
+    corpus = []
+    for dim in sizes:
+        for number_of_pawns in pawn_counts:
+            for index in range(boards_per_case):
+                rng = random.Random(seed * 1000003 + dim * 10007 + number_of_pawns * 101 + index)
+                try:
+                    knight, pawns = solver.generate_starting_locations(dim, number_of_pawns, rng)
+                except ValueError:
+                    continue
+                corpus.append({'dim': dim,
+                               'pawns': number_of_pawns,
+                               'board': index,
+                               'knight': knight.get_position(),
+                               'pawn_list': sorted(solver.describe_pawns(pawns.values()))})
+    return corpus
+
+
+def _solve_and_report(puzzle, algorithm, options, profile, reports):
+    result = solver.solve(puzzle['dim'], puzzle['knight'], puzzle['pawn_list'], algorithm,
+                          stats=solver.SearchStats(profile=profile), **options)
+    stats = result.stats.as_dict()
+    stats['solved'] = result.is_solved()
+    stats['moves'] = len(result.moves)
+    # ru_maxrss is in kilobytes on Linux
+    stats['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    reports.put(stats)
+
+
+def run_one(puzzle, algorithm, timeout, options=None, profile=False):
+    """Solves puzzle in a child process and returns its measurements"""
+    if algorithm not in HEURISTIC_ALGORITHMS or not options:
+        options = dict()
+    reports = multiprocessing.Queue()
+    started = time.time()
+    child = multiprocessing.Process(target=_solve_and_report, args=(puzzle, algorithm, options, profile, reports))
+    child.start()
+    child.join(timeout)
+    run = {'dim': puzzle['dim'], 'pawns': puzzle['pawns'], 'board': puzzle['board'], 'algorithm': algorithm}
+    if child.is_alive():
+        child.terminate()
+        child.join()
+        run.update(status='timeout', wall_time=time.time() - started)
+        return run
+    if child.exitcode != 0 or reports.empty():
+        run.update(status='crashed', exitcode=child.exitcode, wall_time=time.time() - started)
+        return run
+    stats = reports.get()
+    run.update(stats)
+    run['status'] = 'solved' if stats['solved'] else 'unsolved'
+    run['wall_time'] = stats['elapsed']
+    run['nodes_per_second'] = stats['nodes_opened'] / stats['elapsed'] if stats['elapsed'] else None
+    return run
+
+
+def run_corpus(corpus, algorithms, timeout, options=None, profile=False):
+    runs = []
+    for puzzle in corpus:
+        for algorithm in algorithms:
+            run = run_one(puzzle, algorithm, timeout, options, profile)
+            print_run(run)
+            runs.append(run)
+    return runs
+
+
+def run_sweep(sizes, pawn_counts, algorithms, timeout, boards_per_case, seed=0, options=None):
+    """Grows dim, then the number of pawns, until each algorithm stops finishing within timeout.
+
+    Returns the runs and, per algorithm and number of pawns, the first board size it fell over on.
+    """
+    runs = []
+    falls_over = dict()
+    for algorithm in algorithms:
+        falls_over[algorithm] = dict()
+        for number_of_pawns in pawn_counts:
+            for dim in sizes:
+                corpus = build_corpus([dim], [number_of_pawns], boards_per_case, seed)
+                if not corpus:
+                    continue
+                case_runs = [run_one(puzzle, algorithm, timeout, options) for puzzle in corpus]
+                for run in case_runs:
+                    print_run(run)
+                runs.extend(case_runs)
+                if any(run['status'] in ('timeout', 'crashed') for run in case_runs):
+                    falls_over[algorithm][number_of_pawns] = dim
+                    break
+    return runs, falls_over
+
+
+def print_run(run):
+    if run['status'] in ('solved', 'unsolved'):
+        print "%-8s dim %3d pawns %2d board %d: %-8s %3d moves %9d opened %9.3fs %10.0f nodes/s %8d KB" % \
+              (run['algorithm'], run['dim'], run['pawns'], run['board'], run['status'], run['moves'],
+               run['nodes_opened'], run['wall_time'], run['nodes_per_second'] or 0, run['peak_rss_kb'])
+    else:
+        print "%-8s dim %3d pawns %2d board %d: %s after %.3fs" % \
+              (run['algorithm'], run['dim'], run['pawns'], run['board'], run['status'], run['wall_time'])
+    sys.stdout.flush()
+
+
+def describe_environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processors': multiprocessing.cpu_count(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=_int_list, help="comma separated board dimensions")
+    parser.add_argument('--pawns', type=_int_list, help="comma separated pawn counts")
+    parser.add_argument('--boards', type=int, default=3, help="boards per (size, pawns) case")
+    parser.add_argument('--seed', type=int, default=0, help="corpus seed")
+    parser.add_argument('--algorithms', type=lambda v: v.split(','), default=list(DEFAULT_ALGORITHMS))
+    parser.add_argument('--heuristic', help="A* heuristic, h1 by default")
+    parser.add_argument('--timeout', type=float, default=60, help="seconds before a solve is killed")
+    parser.add_argument('--profile', action='store_true', help="time the phases of every search as well")
+    parser.add_argument('--sweep', action='store_true', help="grow the boards until each algorithm falls over")
+    parser.add_argument('--out', help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    options = dict()
+    if args.heuristic:
+        options['heuristic'] = args.heuristic
+    report = {'environment': describe_environment(), 'timeout': args.timeout, 'options': options}
+    if args.sweep:
+        runs, falls_over = run_sweep(args.sizes or SWEEP_SIZES, args.pawns or SWEEP_PAWNS, args.algorithms,
+                                     args.timeout, args.boards, args.seed, options)
+        report['falls_over'] = falls_over
+        for algorithm in args.algorithms:
+            for number_of_pawns, dim in sorted(falls_over[algorithm].items()):
+                print "%s falls over at dim %d with %d pawns" % (algorithm, dim, number_of_pawns)
+    else:
+        corpus = build_corpus(args.sizes or DEFAULT_SIZES, args.pawns or DEFAULT_PAWNS, args.boards, args.seed)
+        runs = run_corpus(corpus, args.algorithms, args.timeout, options, args.profile)
+        report['corpus'] = corpus
+    report['runs'] = runs
+
+    if args.out:
+        with open(args.out, 'w') as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
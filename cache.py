@@ -0,0 +1,80 @@
+"""On disk cache of solved puzzles, so solving the same board twice is a lookup.
+
+Entries are keyed by a canonical encoding of the puzzle and the search that solved it and live in a
+small sqlite file. Once the cache holds more than max_entries, the least recently used go.
+"""
+import json
+import os
+import sqlite3
+import time
+
+from pawn import RIGHT
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.knightsgame', 'solutions.sqlite')
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def puzzle_key(dim, knight, pawns, algorithm, options=None):
+    """Encodes a puzzle and how it is solved as a string, equal for equal puzzles.
+
+    Pawns are sorted, and direction 0, which pawn.py moves like RIGHT, is written as RIGHT.
+    """
+    pawn_list = sorted((x, y, direction or RIGHT) for (x, y, direction) in pawns)
+    option_list = sorted((options or {}).items())
+    return "%d|%d,%d|%s|%s|%s" % (dim, knight[0], knight[1],
+                                  ';'.join("%d,%d,%d" % pawn for pawn in pawn_list),
+                                  algorithm,
+                                  ','.join("%s=%s" % option for option in option_list))
+
+
+class SolutionCache(object):
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = None
+
+    def _connect(self):
+        # Opened on first use, so a cache handed to another process opens its own connection
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS solutions ("
+                                     "key TEXT PRIMARY KEY, solved INTEGER, moves TEXT, last_used REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+        return self._connection
+
+    def get(self, key):
+        """Returns (solved, moves) stored for key, or None"""
+        connection = self._connect()
+        row = connection.execute("SELECT solved, moves FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        solved, moves = row
+        return bool(solved), [tuple(move) for move in json.loads(moves)]
+
+    def put(self, key, solved, moves):
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO solutions (key, solved, moves, last_used) VALUES (?, ?, ?, ?)",
+                               (key, int(solved), json.dumps(moves), time.time()))
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                connection.execute("DELETE FROM solutions WHERE key IN "
+                                   "(SELECT key FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+
+    def clear(self):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM solutions")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
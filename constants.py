@@ -0,0 +1,5 @@
+"""Board geometry shared by the GUI and the models, kept free of any wx import"""
+
+CELLWIDTH = 30
+CELLSPACING = 32
+SPAWNPADDING = 2
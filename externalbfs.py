@@ -0,0 +1,195 @@
+"""External memory breadth first search: every depth is a pair of files on disk.
+
+A depth is stored as the packed states found at it (see packedbfs.py), sorted, next to the packed
+state each was reached from. Only a chunk of states is in memory at once, CHUNK_STATES or
+MIN_MERGE_BLOCK from each run being merged, whichever is more:
+
+ - a depth is read back a chunk at a time, the children of each chunk are made like layeredbfs.py
+   does, sorted and written out as a run
+ - the runs are merged a block at a time, duplicates dropped on the way, and the states already
+   at an earlier depth of the same square colour looked up by binary search in the memory mapped
+   files of those depths
+ - the path is followed back from the goal, one binary search in the file of each depth
+
+So the search is bounded by the disk rather than by memory.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from layeredbfs import LayeredMoves
+from packedbfs import square_bits
+
+# States read, sorted or merged at a time
+CHUNK_STATES = 1 << 20
+# Least states taken from each run per merge step, so that many runs do not mean a step per state
+MIN_MERGE_BLOCK = 4096
+
+
+def external_bfs(solver, stats, directory=None, chunk_states=CHUNK_STATES):
+    """Runs BFS for solver (in bitmask mode) with its depths on disk, returns the path as square ids or None
+
+    @param directory: where to make the folder for the files of the search, removed at the end;
+                      the system temporary directory if None
+    @raise ValueError: for more pawns than fit in a 64 bit state next to the square id
+    """
+    if not solver.bitmask:
+        raise ValueError("The external BFS works on pawn bitmasks")
+    bits = square_bits(solver)
+    if len(solver.pawns_on_the_board) + bits > 64:
+        raise ValueError("%d pawns do not fit in a 64 bit state" % len(solver.pawns_on_the_board))
+    if not solver.root_pawns:
+        return []
+    folder = tempfile.mkdtemp(prefix='knightsgame-bfs-', dir=directory)
+    try:
+        search = ExternalSearch(solver, stats, folder, chunk_states)
+        goal = search.run()
+        if goal is None:
+            return None
+        return [int(state & search.square_mask) for state in search.path(goal)]
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+class ExternalSearch(object):
+    def __init__(self, solver, stats, folder, chunk_states):
+        self.solver = solver
+        self.stats = stats
+        self.folder = folder
+        self.chunk_states = chunk_states
+        self.moves = LayeredMoves(solver)
+        self.square_bits = square_bits(solver)
+        self.shift = np.uint64(self.square_bits)
+        self.square_mask = np.uint64((1 << self.square_bits) - 1)
+        # Number of states at every depth so far
+        self.sizes = []
+
+    def _file(self, depth, kind):
+        return os.path.join(self.folder, '%d.%s' % (depth, kind))
+
+    def _load(self, path):
+        """The uint64 array in path, memory mapped"""
+        if not os.path.getsize(path):
+            return np.zeros(0, dtype=np.uint64)
+        return np.memmap(path, dtype=np.uint64, mode='r')
+
+    def run(self):
+        """Searches depth after depth, returns (depth, index) of a goal state or None"""
+        stats = self.stats
+        start = np.array([self.solver.root_pawns << self.square_bits | self.solver.knight_id], dtype=np.uint64)
+        start.tofile(self._file(0, 'states'))
+        np.zeros(1, dtype=np.uint64).tofile(self._file(0, 'parents'))
+        self.sizes.append(1)
+        depth = 0
+        while self.sizes[depth]:
+            stats.nodes_opened += self.sizes[depth]
+            stats.peak_frontier = max(stats.peak_frontier, self.sizes[depth])
+            if 0 <= stats.next_checkpoint <= stats.nodes_opened:
+                stats.checkpoint(self.sizes[depth], sum(self.sizes), depth)
+                while stats.next_checkpoint <= stats.nodes_opened:
+                    stats.next_checkpoint += stats.callback_interval
+            runs = self._expand(depth)
+            goal = self._merge(runs, depth + 1)
+            for run in runs:
+                os.remove(run + '.states')
+                os.remove(run + '.parents')
+            depth += 1
+            stats.peak_closed = max(stats.peak_closed, sum(self.sizes))
+            if goal is not None:
+                stats.finish(self.sizes[depth], sum(self.sizes), depth)
+                return depth, goal
+        stats.finish(0, sum(self.sizes), depth)
+        return None
+
+    def _expand(self, depth):
+        """Writes the children of every state at depth as sorted runs, returns their paths"""
+        stats = self.stats
+        states = self._load(self._file(depth, 'states'))
+        runs = []
+        for begin in range(0, len(states), self.chunk_states):
+            frontier = np.array(states[begin:begin + self.chunk_states])
+            children = self.moves.targets[(frontier & self.square_mask).astype(np.int64)]
+            parents, columns = np.nonzero(children >= 0)
+            squares = children[parents, columns]
+            pawns_alive = frontier[parents] >> self.shift
+            caught = pawns_alive & self.moves.capture_masks[squares]
+            stats.nodes_generated += len(squares)
+            stats.caught_pawns += int(np.unpackbits(caught[caught != 0].view(np.uint8)).sum())
+            child_states = (pawns_alive ^ caught) << self.shift | squares.astype(np.uint64)
+            order = child_states.argsort()
+            run = os.path.join(self.folder, 'run%d' % len(runs))
+            child_states[order].tofile(run + '.states')
+            frontier[parents[order]].tofile(run + '.parents')
+            runs.append(run)
+        return runs
+
+    def _merge(self, runs, depth):
+        """Merges the runs into the files of depth, without duplicates or states of earlier depths.
+
+        Returns the index at depth of a goal state, None if there is none.
+        """
+        stats = self.stats
+        run_states = [self._load(run + '.states') for run in runs]
+        run_parents = [self._load(run + '.parents') for run in runs]
+        positions = [0] * len(runs)
+        # The knight changes square colour every move, only every other depth can hold the same states
+        earlier = [self._load(self._file(before, 'states')) for before in range(depth - 2, -1, -2)]
+        block = max(MIN_MERGE_BLOCK, self.chunk_states // max(1, len(runs)))
+        size = 0
+        goal = None
+        with open(self._file(depth, 'states'), 'wb') as states_file, \
+                open(self._file(depth, 'parents'), 'wb') as parents_file:
+            while True:
+                left = [i for i in range(len(runs)) if positions[i] < len(run_states[i])]
+                if not left:
+                    break
+                # Up to the smallest last state of the next block of each run, so about a block of
+                # every run, and all the copies of a state go in the same merge
+                bound = min(run_states[i][min(positions[i] + block, len(run_states[i])) - 1] for i in left)
+                states = []
+                parents = []
+                for i in left:
+                    end = positions[i] + np.searchsorted(run_states[i][positions[i]:], bound, side='right')
+                    states.append(run_states[i][positions[i]:end])
+                    parents.append(run_parents[i][positions[i]:end])
+                    positions[i] = end
+                states = np.concatenate(states)
+                parents = np.concatenate(parents)
+                order = states.argsort()
+                states = states[order]
+                parents = parents[order]
+                distinct = np.empty(len(states), dtype=bool)
+                distinct[:1] = True
+                np.not_equal(states[1:], states[:-1], out=distinct[1:])
+                for before in earlier:
+                    if len(before):
+                        at = np.searchsorted(before, states)
+                        distinct &= before[np.minimum(at, len(before) - 1)] != states
+                states = states[distinct]
+                parents = parents[distinct]
+                if goal is None:
+                    goals = np.nonzero(states >> self.shift == 0)[0]
+                    if len(goals):
+                        goal = size + goals[0]
+                states.tofile(states_file)
+                parents.tofile(parents_file)
+                size += len(states)
+        stats.nodes_put += size
+        self.sizes.append(size)
+        return goal
+
+    def path(self, (depth, index)):
+        """The states after the start on the way to the state at index of depth"""
+        path = []
+        state = self._load(self._file(depth, 'states'))[index]
+        while depth:
+            path.append(state)
+            parent = self._load(self._file(depth, 'parents'))[index]
+            depth -= 1
+            states = self._load(self._file(depth, 'states'))
+            index = np.searchsorted(states, parent)
+            state = parent
+        path.reverse()
+        return path
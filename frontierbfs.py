@@ -0,0 +1,103 @@
+"""Frontier search: a breadth first search that only remembers the last depths.
+
+The knight always changes square colour, so a state can only turn up again an even number of
+depths later. Where the knight jumps back the way it came and catches nothing, that is exactly two
+depths later, and checking the children against the depth before the one expanded, and against
+each other, catches it. Not every move can be undone though: near the grey border
+compute_valid_moves allows some jumps but not the one back, 88 of the 232 moves on an 8x8 board
+and 312 of 3032 on 22x22. None of these one-way moves lies on a cycle, so the board falls apart in
+areas where every move can be undone, joined by one-way moves that never lead back, the same as
+a capture never gives a pawn back. Within one area and pawn state the duplicate detection is
+complete, but when the search enters it again later, through another one-way move or capture, its
+states are expanded once more, along with what follows them. There are only so many ways in, so
+the search still ends, having opened up to about twice the states the packed BFS does on the
+boards tried (see test_frontierbfs.py), in exchange for keeping three depths at most.
+
+Without the old depths there are no parents to follow back to the start. The path is rebuilt by
+divide and conquer instead: once the goal is known, along with its depth, a second search notes for
+every state its ancestor at half that depth, and the two halves are solved the same way.
+"""
+from packedbfs import square_bits
+
+
+def frontier_bfs(solver, stats):
+    """Runs BFS for solver (in bitmask mode) keeping three depths at most, returns the path as square ids or None"""
+    if not solver.bitmask:
+        raise ValueError("The frontier BFS works on pawn bitmasks")
+    if not solver.root_pawns:
+        return []
+    search = FrontierSearch(solver, stats)
+    start = solver.root_pawns << search.square_bits | solver.knight_id
+    found = search.search(start, lambda state: not state >> search.square_bits)
+    if found is None:
+        return None
+    goal, depth, relay = found
+    return [state & search.square_mask for state in search.path(start, goal, depth)]
+
+
+class FrontierSearch(object):
+    """Searches between packed states (see packedbfs.py) of solver, counting into stats"""
+
+    def __init__(self, solver, stats):
+        self.solver = solver
+        self.stats = stats
+        self.square_bits = square_bits(solver)
+        self.square_mask = (1 << self.square_bits) - 1
+
+    def search(self, start, is_goal, relay_depth=None):
+        """Breadth first from start to the nearest state is_goal is true of.
+
+        Returns (goal, depth of goal, ancestor of goal at relay_depth), None if no goal can be reached.
+        """
+        stats = self.stats
+        neighbours = self.solver.move_table.neighbours
+        capture_masks = self.solver.capture_masks
+        square_bits = self.square_bits
+        square_mask = self.square_mask
+
+        # Every state of a depth, with its ancestor at relay_depth once past it
+        previous = dict()
+        current = {start: start if relay_depth == 0 else None}
+        depth = 0
+        while current:
+            next_depth = dict()
+            relay_here = depth + 1 == relay_depth
+            for state, relay in current.iteritems():
+                stats.nodes_opened += 1
+                if stats.nodes_opened == stats.next_checkpoint:
+                    stats.checkpoint(len(current) + len(next_depth), len(previous), depth)
+                pawns_alive = state >> square_bits
+                for square in neighbours[state & square_mask]:
+                    stats.nodes_generated += 1
+                    child_pawns = pawns_alive
+                    caught = pawns_alive & capture_masks.get(square, 0)
+                    if caught:
+                        stats.caught_pawns += bin(caught).count('1')
+                        child_pawns ^= caught
+                    child = child_pawns << square_bits | square
+                    if child in next_depth or child in previous:
+                        continue
+                    next_depth[child] = child if relay_here else relay
+                    stats.nodes_put += 1
+                    if is_goal(child):
+                        stats.finish(len(next_depth), len(current) + len(previous), depth + 1)
+                        return child, depth + 1, next_depth[child]
+            stats.peak_frontier = max(stats.peak_frontier, len(next_depth))
+            stats.peak_closed = max(stats.peak_closed, len(current) + len(previous))
+            previous, current = current, next_depth
+            depth += 1
+        stats.finish(0, len(previous), depth)
+        return None
+
+    def path(self, start, goal, depth):
+        """The states after start on a shortest path to goal, which is at most depth moves away"""
+        if start == goal:
+            return []
+        if depth == 1:
+            return [goal]
+        middle = depth // 2
+        (goal, depth, relay) = self.search(start, lambda state: state == goal, middle)
+        if relay is None:
+            # A state found again after a one-way move or a capture can be nearer than the depth it was found at
+            return self.path(start, goal, depth)
+        return self.path(start, relay, middle) + self.path(relay, goal, depth - middle)
@@ -1,5 +1,157 @@
+from array import array
+
 from graph import Vertex
 
+# One move table per board dimension, they never change once built
+_move_tables = dict()
+_distance_tables = dict()
+
+UNREACHABLE = -1
+
+
+def compute_valid_moves(x, y, dim):
+    """The squares a knight on (x, y) may jump to, as a set of (x, y)"""
+    valid_move_set = set()
+    max_x = max_y = dim - 2
+    min_x = min_y = 1
+    if x - 2 >= min_x:
+        # can go full left
+        if y + 1 < max_y:
+            valid_move_set.add((x - 2, y + 1))
+        if y - 1 > min_y:
+            valid_move_set.add((x - 2, y - 1))
+    elif x - 1 >= min_x:
+        # can only go partially left
+        if y + 2 < max_y:
+            valid_move_set.add((x - 1, y + 2))
+        if y - 2 > min_y:
+            valid_move_set.add((x - 1, y - 2))
+    if x + 2 <= max_x:
+        # can go full right
+        if y + 1 < max_y:
+            valid_move_set.add((x + 2, y + 1))
+        if y - 1 > min_y:
+            valid_move_set.add((x + 2, y - 1))
+    elif x + 1 <= max_x:
+        # can go partially right
+        if y + 2 < max_y:
+            valid_move_set.add((x + 1, y + 2))
+        if y - 2 > min_y:
+            valid_move_set.add((x + 1, y - 2))
+    if y + 2 <= max_y:
+        if x + 1 < max_x:
+            valid_move_set.add((x + 1, y + 2))
+        if x - 1 > min_x:
+            valid_move_set.add((x - 1, y + 2))
+    elif y + 1 <= max_y:
+        if x - 2 > min_x:
+            valid_move_set.add((x - 2, y + 1))
+        if x + 2 < max_x:
+            valid_move_set.add((x + 2, y + 1))
+    if y - 2 >= min_y:
+        if x + 1 < max_x:
+            valid_move_set.add((x + 1, y - 2))
+        if x - 1 > min_x:
+            valid_move_set.add((x - 1, y - 2))
+    elif y - 1 >= min_y:
+        if x - 2 > min_x:
+            valid_move_set.add((x - 2, y - 1))
+        if x + 2 < max_x:
+            valid_move_set.add((x + 2, y - 1))
+    return valid_move_set
+
+
+class MoveTable(object):
+    """Every legal knight move on a dim x dim board, in CSR form.
+
+    The moves out of square id i are targets[offsets[i]:offsets[i + 1]], square ids being numbered
+    like the board canvas does (see solver.build_coord_mappings). neighbours[i] holds the same
+    moves as a tuple for the pure Python loops.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.size = dim * dim + 1
+        self.offsets = array('i', [0, 0])
+        self.targets = array('i')
+        self.neighbours = [()]
+        self.coord_neighbours = dict()
+        for i in range(dim):
+            for j in range(dim):
+                valid_move_set = compute_valid_moves(i, j, dim)
+                # Same iteration order as the set of ids get_valid_moves used to build
+                moves = tuple(set(x * dim + y + 1 for (x, y) in valid_move_set))
+                self.targets.extend(moves)
+                self.offsets.append(len(self.targets))
+                self.neighbours.append(moves)
+                self.coord_neighbours[(i, j)] = frozenset(valid_move_set)
+
+
+def get_move_table(dim):
+    """Returns the move table for dim, building it on first use"""
+    move_table = _move_tables.get(dim)
+    if move_table is None:
+        move_table = MoveTable(dim)
+        _move_tables[dim] = move_table
+    return move_table
+
+
+class DistanceTable(object):
+    """Exact number of knight moves between squares of a dim x dim board.
+
+    Rows are filled in one target square at a time, the first time somebody asks for them, with a
+    breadth first search over the reversed move table. Squares that cannot reach the target are
+    UNREACHABLE.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.move_table = get_move_table(dim)
+        self._predecessors = None
+        self._to_target = dict()
+
+    def distances_to(self, target):
+        """Returns an array, indexed by square id, of the moves needed to reach target"""
+        distances = self._to_target.get(target)
+        if distances is None:
+            distances = self._search_backwards(target)
+            self._to_target[target] = distances
+        return distances
+
+    def distance(self, source, target):
+        return self.distances_to(target)[source]
+
+    def _search_backwards(self, target):
+        if self._predecessors is None:
+            predecessors = [[] for i in range(self.move_table.size)]
+            for source, moves in enumerate(self.move_table.neighbours):
+                for destination in moves:
+                    predecessors[destination].append(source)
+            self._predecessors = predecessors
+        distances = array('i', [UNREACHABLE]) * self.move_table.size
+        distances[target] = 0
+        frontier = [target]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for square in frontier:
+                for source in self._predecessors[square]:
+                    if distances[source] == UNREACHABLE:
+                        distances[source] = depth
+                        next_frontier.append(source)
+            frontier = next_frontier
+        return distances
+
+
+def get_distance_table(dim):
+    """Returns the distance table for dim, shared by every solve on that board size"""
+    distance_table = _distance_tables.get(dim)
+    if distance_table is None:
+        distance_table = DistanceTable(dim)
+        _distance_tables[dim] = distance_table
+    return distance_table
+
 
 class Knight(Vertex):
     def __init__(self, x, y, dim):
@@ -11,69 +163,17 @@ class Knight(Vertex):
         self.coord_to_int_mappings = mappings
         self.int_to_coord_mappings = backwards_mapping
 
-    def get_valid_moves(self, int=None,fx=0, fy=0):
-        valid_move_set = set()
-        max_x = max_y = self.dim - 2
-        min_x = min_y = 1
+    def get_valid_moves(self, int=None, fx=0, fy=0):
+        move_table = get_move_table(self.dim)
         if int is not None:
-            x,y = self.int_to_coord_mappings[int]
+            return set(move_table.neighbours[int])
         elif fx == 0 or fy == 0:
             x = self.get_x_coord()
             y = self.get_y_coord()
         else:
             x = fx
             y = fy
-        if x - 2 >= min_x:
-            # can go full left
-            if y + 1 < max_y:
-                valid_move_set.add((x - 2, y + 1))
-            if y - 1 > min_y:
-                valid_move_set.add((x - 2, y - 1))
-        elif x - 1 >= min_x:
-            # can only go partially left
-            if y + 2 < max_y:
-                valid_move_set.add((x - 1, y + 2))
-            if y - 2 > min_y:
-                valid_move_set.add((x - 1, y - 2))
-        if x + 2 <= max_x:
-            # can go full right
-            if y + 1 < max_y:
-                valid_move_set.add((x + 2, y + 1))
-            if y - 1 > min_y:
-                valid_move_set.add((x + 2, y - 1))
-        elif x + 1 <= max_x:
-            # can go partially right
-            if y + 2 < max_y:
-                valid_move_set.add((x + 1, y + 2))
-            if y - 2 > min_y:
-                valid_move_set.add((x + 1, y - 2))
-        if y + 2 <= max_y:
-            if x + 1 < max_x:
-                valid_move_set.add((x + 1, y + 2))
-            if x - 1 > min_x:
-                valid_move_set.add((x - 1, y + 2))
-        elif y + 1 <= max_y:
-            if x - 2 > min_x:
-                valid_move_set.add((x - 2, y + 1))
-            if x + 2 < max_x:
-                valid_move_set.add((x + 2, y + 1))
-        if y - 2 >= min_y:
-            if x + 1 < max_x:
-                valid_move_set.add((x + 1, y - 2))
-            if x - 1 > min_x:
-                valid_move_set.add((x - 1, y - 2))
-        elif y - 1 >= min_y:
-            if x - 2 > min_x:
-                valid_move_set.add((x - 2, y - 1))
-            if x + 2 < max_x:
-                valid_move_set.add((x + 2, y - 1))
-        if int:
-            int_set = set()
-            for i in valid_move_set:
-                int_set.add(self.coord_to_int_mappings[i])
-            return int_set
-        else:
-            return valid_move_set
+        return set(move_table.coord_neighbours[(x, y)])
 
     def get_x_coord(self):
         return self.point.x
@@ -0,0 +1,113 @@
+"""Breadth first search a whole depth at a time with NumPy.
+
+Each depth is an array of packed states (see packedbfs.py) and is expanded in one go: the moves
+of every state are gathered from the move table, the pawns caught masked off, and the children
+deduplicated against each other by sorting and against every depth before with a binary search
+in the sorted array of the states seen, which the new states are then merged into in place. No
+Python code runs per state.
+"""
+import numpy as np
+
+from packedbfs import square_bits
+
+
+class LayeredMoves(object):
+    """The move table as a (squares x most moves) array, -1 past the moves of a square
+
+    @param solver: the solver.Solver whose board and pawns to work on
+    """
+
+    def __init__(self, solver):
+        move_table = solver.move_table
+        offsets = np.frombuffer(move_table.offsets, dtype=np.int32)
+        targets = np.frombuffer(move_table.targets, dtype=np.int32)
+        counts = np.diff(offsets)
+        self.targets = np.full((move_table.size, max(counts.max(), 1)), -1, dtype=np.int64)
+        for column in range(self.targets.shape[1]):
+            has_move = counts > column
+            self.targets[has_move, column] = targets[offsets[:-1][has_move] + column]
+        self.capture_masks = np.zeros(move_table.size, dtype=np.uint64)
+        for square, mask in solver.capture_masks.items():
+            self.capture_masks[square] = mask
+
+
+def layered_bfs(solver, stats):
+    """Runs BFS for solver (in bitmask mode) one depth at a time, returns the path as square ids or None
+
+    @raise ValueError: for more pawns than fit in a 64 bit state next to the square id
+    """
+    if not solver.bitmask:
+        raise ValueError("The layered BFS works on pawn bitmasks")
+    bits = square_bits(solver)
+    if len(solver.pawns_on_the_board) + bits > 64:
+        raise ValueError("%d pawns do not fit in a 64 bit state" % len(solver.pawns_on_the_board))
+    if not solver.root_pawns:
+        return []
+    moves = LayeredMoves(solver)
+    shift = np.uint64(bits)
+    square_mask = np.uint64((1 << bits) - 1)
+
+    # The squares of every depth and, for each, the index of its parent in the depth before
+    layer_squares = [np.array([solver.knight_id], dtype=np.int64)]
+    layer_parents = [np.array([-1], dtype=np.int64)]
+    frontier = np.array([solver.root_pawns << bits | solver.knight_id], dtype=np.uint64)
+    # The start is not in seen: the knight catches nothing there but does coming back to it
+    seen = np.zeros(0, dtype=np.uint64)
+    depth = 0
+    while len(frontier):
+        stats.nodes_opened += len(frontier)
+        if 0 <= stats.next_checkpoint <= stats.nodes_opened:
+            stats.checkpoint(len(frontier), len(seen), depth)
+            while stats.next_checkpoint <= stats.nodes_opened:
+                stats.next_checkpoint += stats.callback_interval
+        stats.peak_frontier = max(stats.peak_frontier, len(frontier))
+
+        # Every move of every state, as (parent, square) pairs
+        children = moves.targets[(frontier & square_mask).astype(np.int64)]
+        parents, columns = np.nonzero(children >= 0)
+        squares = children[parents, columns]
+        pawns_alive = frontier[parents] >> shift
+        caught = pawns_alive & moves.capture_masks[squares]
+        stats.nodes_generated += len(squares)
+        stats.caught_pawns += int(np.unpackbits(caught[caught != 0].view(np.uint8)).sum())
+        states = (pawns_alive ^ caught) << shift | squares.astype(np.uint64)
+
+        # One of each child of this depth, whichever parent it keeps, then only those no depth before has
+        order = states.argsort()
+        states = states[order]
+        distinct = np.empty(len(states), dtype=bool)
+        distinct[:1] = True
+        np.not_equal(states[1:], states[:-1], out=distinct[1:])
+        states = states[distinct]
+        kept = order[distinct]
+        at = np.searchsorted(seen, states)
+        if len(seen):
+            new = seen[np.minimum(at, len(seen) - 1)] != states
+            states = states[new]
+            kept = kept[new]
+            at = at[new]
+        stats.nodes_put += len(states)
+        depth += 1
+        layer_squares.append(squares[kept])
+        layer_parents.append(parents[kept])
+
+        goals = np.nonzero(states >> shift == 0)[0]
+        if len(goals):
+            stats.finish(len(states), len(seen), depth)
+            return _path(layer_squares, layer_parents, goals[0])
+
+        # Both are sorted, inserting keeps seen sorted without sorting it again
+        seen = np.insert(seen, at, states)
+        frontier = states
+    stats.finish(0, len(seen), depth)
+    return None
+
+
+def _path(layer_squares, layer_parents, index):
+    """The squares leading to state index of the last depth, the start excluded"""
+    path = []
+    for depth in range(len(layer_squares) - 1, 0, -1):
+        path.append(int(layer_squares[depth][index]))
+        index = layer_parents[depth][index]
+    path.reverse()
+    return path
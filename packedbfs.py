@@ -0,0 +1,135 @@
+"""Breadth first search over packed states.
+
+A state (knight square, pawns alive) is one integer, the pawn bitmask of Solver(bitmask=True)
+shifted above the bits of the square id. The states found go into flat arrays, in the order BFS
+finds them, and next to each one the index of the state it was reached from. So there is no object
+per state, the arrays are the queue as well, and the path to a state is read back index by index.
+The states seen are flagged in a bytearray with a byte for every packed state there can be, a
+lot less than a set of them would take.
+"""
+from array import array
+
+# Predecessor of the start state
+NO_PARENT = -1
+# Python 2 arrays have no 'Q', unsigned long is the widest there is (64 bits on most 64 bit builds)
+STATE_TYPECODE = 'L'
+STATE_BITS = 8 * array(STATE_TYPECODE).itemsize
+# Most bytes the flags of the states seen may take, with more pawns than that allows they go in a set
+SEEN_FLAGS_MAX_BYTES = 1 << 28
+
+
+def square_bits(solver):
+    """Bits the square ids of the board of solver take in a packed state"""
+    return (solver.move_table.size - 1).bit_length()
+
+
+class PackedStates(object):
+    """The states of a search, packed, with the index of the state each one was reached from.
+
+    States are kept in an array of unsigned longs when they fit in one, in a list of Python integers
+    past STATE_BITS - square_bits pawns.
+    @param solver: the solver.Solver (in bitmask mode) the states are of
+    """
+
+    def __init__(self, solver):
+        self.square_bits = square_bits(solver)
+        self.square_mask = (1 << self.square_bits) - 1
+        if len(solver.pawns_on_the_board) + self.square_bits <= STATE_BITS:
+            self.states = array(STATE_TYPECODE)
+        else:
+            self.states = []
+        self.parents = array('i')
+
+    def pack(self, square, pawns_alive):
+        return pawns_alive << self.square_bits | square
+
+    def unpack(self, state):
+        """Returns (square, pawns alive) of a packed state"""
+        return state & self.square_mask, state >> self.square_bits
+
+    def append(self, state, parent):
+        """Adds a packed state reached from the state at index parent, returns its index"""
+        self.states.append(state)
+        self.parents.append(parent)
+        return len(self.parents) - 1
+
+    def path(self, index):
+        """The squares from the first state to the one at index, the first excluded"""
+        squares = []
+        while self.parents[index] != NO_PARENT:
+            squares.append(self.states[index] & self.square_mask)
+            index = self.parents[index]
+        squares.reverse()
+        return squares
+
+    def __len__(self):
+        return len(self.parents)
+
+
+def seen_flags(solver):
+    """A zero byte for every packed state of solver, None if there are more than SEEN_FLAGS_MAX_BYTES"""
+    size = 1 << len(solver.pawns_on_the_board) + square_bits(solver)
+    if size > SEEN_FLAGS_MAX_BYTES:
+        return None
+    return bytearray(size)
+
+
+def packed_bfs(solver, stats):
+    """Runs BFS for solver (in bitmask mode), returns the path as square ids or None.
+
+    A state is never queued twice, whatever the depth it comes back at, and pawns are caught as
+    the states are generated, so a goal is recognised the moment it is found.
+    """
+    if not solver.bitmask:
+        raise ValueError("The packed BFS works on pawn bitmasks")
+    if not solver.root_pawns:
+        return []
+    store = PackedStates(solver)
+    states = store.states
+    parents = store.parents
+    neighbours = solver.move_table.neighbours
+    capture_masks = solver.capture_masks
+    square_bits = store.square_bits
+    square_mask = store.square_mask
+
+    # The start is not flagged as seen: the knight catches nothing there but does coming back to it
+    store.append(store.pack(solver.knight_id, solver.root_pawns), NO_PARENT)
+    flags = seen_flags(solver)
+    seen = set() if flags is None else None
+    head = 0
+    depth = 0
+    # Index of the first state of the next depth
+    depth_end = 1
+    while head < len(parents):
+        if head == depth_end:
+            depth += 1
+            depth_end = len(parents)
+        stats.nodes_opened += 1
+        if stats.nodes_opened == stats.next_checkpoint:
+            stats.checkpoint(len(parents) - head, len(parents), depth)
+        state = states[head]
+        pawns_alive = state >> square_bits
+        for square in neighbours[state & square_mask]:
+            stats.nodes_generated += 1
+            child_pawns = pawns_alive
+            caught = pawns_alive & capture_masks.get(square, 0)
+            if caught:
+                stats.caught_pawns += bin(caught).count('1')
+                child_pawns ^= caught
+            child = child_pawns << square_bits | square
+            if flags is not None:
+                if flags[child]:
+                    continue
+                flags[child] = 1
+            elif child in seen:
+                continue
+            else:
+                seen.add(child)
+            index = store.append(child, head)
+            stats.nodes_put += 1
+            if not child_pawns:
+                stats.finish(len(parents) - head - 1, len(parents), depth + 1)
+                return store.path(index)
+        head += 1
+    stats.finish(0, len(parents), depth)
+    return None
@@ -0,0 +1,201 @@
+"""Hash distributed A* (HDA*) over several worker processes.
+
+Every state (knight square, pawns alive) belongs to exactly one worker, picked by its Zobrist key
+(see zobrist.py), which every process works out the same and which travels along with the state.
+A worker keeps the open heap and the closed set of its own states only, expands them with the
+regular A* expansion of the solver and ships the children it does not own to their owner in batches.
+"""
+import multiprocessing
+import sys
+import traceback
+from Queue import Empty
+from heapq import heappush, heappop
+
+from statespace import StateSpaceNodeAStar
+
+# How many nodes a worker expands before it sends its children out
+EXPANSIONS_PER_ROUND = 64
+IDLE_WAIT_SECONDS = 0.01
+# How long the parent waits for a message before it looks whether the workers are still alive
+WORKER_CHECK_SECONDS = 0.5
+
+
+class WorkerFailed(Exception):
+    """A worker raised or died, the search cannot finish without its states"""
+
+
+def owner_of(key, processes):
+    """The worker responsible for the state with Zobrist key key"""
+    return key % processes
+
+
+def hda_star(solver, heuristic='h1', processes=None, optimal=True, profile=False):
+    """Runs A* for solver over processes workers, returns (path of square ids, per worker stats).
+
+    A worker only orders its own states, so the first goal any of them reaches can be much longer
+    than the plan astar finds. The cost of the best goal so far is shared instead, and the workers
+    keep going, dropping every state whose priority cannot beat it, until no state is left anywhere.
+    With h4 that gives a plan as short as astar's, whatever the number of processes.
+
+    @param optimal: False stops the search at the first goal any worker reaches, quicker but
+                    with a plan that can be longer and changes with the number of processes
+    @raise WorkerFailed: when a worker raises, with its traceback, or exits without its stats
+    """
+    processes = processes or multiprocessing.cpu_count()
+    inboxes = [multiprocessing.Queue() for i in range(processes)]
+    results = multiprocessing.Queue()
+    # States sitting in an open heap or in a queue, when it drops to 0 the search space is exhausted
+    work = multiprocessing.Value('l', 1)
+    best_cost = multiprocessing.Value('d', float(sys.maxint))
+    stop = multiprocessing.Event()
+
+    workers = []
+    for index in range(processes):
+        worker = multiprocessing.Process(target=_run_worker,
+                                         args=(solver, heuristic, index, inboxes, results, work,
+                                               best_cost, stop, optimal, profile))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    root_owner = owner_of(solver.root_key, processes)
+    inboxes[root_owner].put([(0, 0, solver.knight_id, solver.root_pawns, solver.root_key, ())])
+
+    best_path = None
+    worker_stats = []
+    while len(worker_stats) < processes:
+        try:
+            kind, value = results.get(timeout=WORKER_CHECK_SECONDS)
+        except Empty:
+            # A worker that finished sent its stats before exiting, any other exit is a crash
+            for index, worker in enumerate(workers):
+                if not worker.is_alive() and worker.exitcode != 0:
+                    _stop_workers(workers, stop)
+                    raise WorkerFailed("HDA* worker %d exited with code %s" % (index, worker.exitcode))
+            continue
+        if kind == 'goal':
+            cost, path = value
+            if best_path is None or cost < len(best_path):
+                best_path = path
+        elif kind == 'error':
+            _stop_workers(workers, stop)
+            raise WorkerFailed("An HDA* worker raised:\n%s" % value)
+        else:
+            worker_stats.append(value)
+    for worker in workers:
+        worker.join()
+    return best_path, worker_stats
+
+
+def _stop_workers(workers, stop):
+    stop.set()
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+
+
+def _run_worker(solver, heuristic, index, inboxes, results, work, best_cost, stop, optimal, profile):
+    """Body of a worker process, any exception goes back to the parent as an 'error' message"""
+    try:
+        _search(solver, heuristic, index, inboxes, results, work, best_cost, stop, optimal, profile)
+    except Exception:
+        results.put(('error', traceback.format_exc()))
+
+
+def _search(solver, heuristic, index, inboxes, results, work, best_cost, stop, optimal, profile):
+    from solver import SearchStats
+    stats = SearchStats(profile=profile)
+    h = getattr(solver, heuristic)
+    processes = len(inboxes)
+    inbox = inboxes[index]
+    heap = []
+    closed_set = dict()
+    sequence = 0
+
+    while not stop.is_set():
+        finished = 0
+        created = 0
+
+        # Take in everything the other workers sent us
+        while True:
+            try:
+                batch = inbox.get_nowait()
+            except Empty:
+                break
+            for (priority, cost, position, pawns, state_key, path) in batch:
+                key = (position, pawns, not cost)
+                if priority >= best_cost.value or (key in closed_set and closed_set[key] <= cost):
+                    finished += 1
+                    continue
+                closed_set[key] = cost
+                sequence += 1
+                heappush(heap, (priority, sequence, cost, position, pawns, state_key, path))
+                stats.nodes_put += 1
+
+        outgoing = [[] for i in range(processes)]
+        for i in range(EXPANSIONS_PER_ROUND):
+            if not heap:
+                break
+            priority, s, cost, position, pawns, state_key, path = heappop(heap)
+            finished += 1
+            if len(heap) >= stats.peak_frontier:
+                stats.peak_frontier = len(heap) + 1
+            if cost > stats.max_depth:
+                stats.max_depth = cost
+            if priority >= best_cost.value or closed_set.get((position, pawns, not cost), cost) < cost:
+                continue
+            stats.nodes_opened += 1
+            node = StateSpaceNodeAStar(None, position, cost, pawns, priority, cost, state_key)
+            children = solver._expand_astar_node(node, h, stats)
+            if children is None:
+                with best_cost.get_lock():
+                    if cost < best_cost.value:
+                        best_cost.value = cost
+                        results.put(('goal', (cost, path)))
+                if not optimal:
+                    stop.set()
+                    break
+                continue
+            for child in children:
+                child_pawns = child.int_position_pawns_caught
+                child_path = path + (child.path_id,)
+                created += 1
+                owner = owner_of(child.key, processes)
+                if owner != index:
+                    outgoing[owner].append((child.priority, child.cost, child.path_id, child_pawns, child.key,
+                                            child_path))
+                    continue
+                key = (child.path_id, child_pawns, False)
+                if key in closed_set and closed_set[key] <= child.cost:
+                    finished += 1
+                    continue
+                closed_set[key] = child.cost
+                sequence += 1
+                heappush(heap, (child.priority, sequence, child.cost, child.path_id, child_pawns, child.key,
+                                child_path))
+                stats.nodes_put += 1
+
+        # Count the children before anybody can see them, and our own expansions only after,
+        # so the work counter can never touch 0 while a state is still around
+        if created:
+            with work.get_lock():
+                work.value += created
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(batch)
+        if finished:
+            with work.get_lock():
+                work.value -= finished
+
+        if not heap:
+            if work.value == 0:
+                stop.set()
+            else:
+                stop.wait(IDLE_WAIT_SECONDS)
+
+    # Whatever is still queued for the others is of no use any more, don't wait for it to be delivered
+    for other_inbox in inboxes:
+        other_inbox.cancel_join_thread()
+    stats.finish(len(heap), len(closed_set), 0)
+    results.put(('stats', stats.as_dict()))
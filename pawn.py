@@ -1,10 +1,12 @@
 from graph import Vertex, Point
-from main import CELLSPACING
+from constants import CELLSPACING
 
 RIGHT = 4
 LEFT = 3
 UP = 1
 DOWN = 2
+# The direction a pawn walks in on its way back, see Pawn.move
+OPPOSITE_DIRECTIONS = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
 
 
 class Pawn(Vertex):
@@ -0,0 +1,302 @@
+"""Draws the board on a FloatCanvas and keeps it up to date turn after turn.
+
+Every square and every piece is one canvas object, created once when the board is built. A turn
+only recolours the squares whose colour changed and moves the pieces that moved, and all the
+changes of a turn are shown by a single redraw.
+
+The squares are made in one batch and are not bound one by one: a single handler on the canvas
+works out which square a click fell on from its coordinates. A new game on a board of the same
+size keeps the squares and pieces it has and only resets them.
+
+Boards of CULL_MIN_DIM squares and more never have all their squares on the canvas. Before every
+draw the canvas asks for the squares in view and only those are on it. Zoomed out far enough
+that a square is under LOD_CELL_PIXELS wide, the squares give way to one bitmap with a pixel per
+square, the pieces staying drawn over it.
+"""
+import wx
+from wx.lib.floatcanvas import FloatCanvas
+
+from constants import CELLWIDTH, CELLSPACING
+from graph import Point
+
+KNIGHT = u"\u265E"
+PAWN = u"\u265F"
+EDGE_COLOR = "Grey"
+SQUARE_COLOR = "White"
+# From this size on, only the squares in view are put on the canvas
+CULL_MIN_DIM = 50
+# Squares drawn narrower than this, in pixels, are shown as the board bitmap instead
+LOD_CELL_PIXELS = 12
+ZOOM_STEP = 1.25
+
+
+class BoardCanvas(FloatCanvas.FloatCanvas):
+    """A FloatCanvas zoomed with the mouse wheel and panned dragging with the right button.
+
+    before_draw, when set, is called ahead of every draw, once the viewport is known.
+    """
+
+    def __init__(self, *args, **kwargs):
+        FloatCanvas.FloatCanvas.__init__(self, *args, **kwargs)
+        self.before_draw = None
+        self._pan_from = None
+        self.Bind(wx.EVT_MOUSEWHEEL, self._on_wheel)
+        self.Bind(wx.EVT_RIGHT_DOWN, self._on_right_down)
+        self.Bind(wx.EVT_RIGHT_UP, self._on_right_up)
+        self.Bind(wx.EVT_MOTION, self._on_motion)
+
+    def Draw(self, Force=False):
+        if self.before_draw is not None:
+            self.before_draw()
+        FloatCanvas.FloatCanvas.Draw(self, Force)
+
+    def viewport(self):
+        """The world coordinates (min_x, min_y, max_x, max_y) in view"""
+        (x0, y0) = self.PixelToWorld((0, 0))
+        (x1, y1) = self.PixelToWorld(self.PanelSize)
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+    def _on_wheel(self, event):
+        factor = ZOOM_STEP if event.GetWheelRotation() > 0 else 1 / ZOOM_STEP
+        self.Zoom(factor, self.PixelToWorld(event.GetPosition()))
+
+    def _on_right_down(self, event):
+        self._pan_from = event.GetPosition()
+        event.Skip()
+
+    def _on_right_up(self, event):
+        self._pan_from = None
+        event.Skip()
+
+    def _on_motion(self, event):
+        if self._pan_from is not None and event.RightIsDown():
+            position = event.GetPosition()
+            self.MoveImage((self._pan_from[0] - position[0], self._pan_from[1] - position[1]), 'Pixel')
+            self._pan_from = position
+        event.Skip()
+
+
+class BoardRenderer(object):
+    def __init__(self, canvas, dim, on_click):
+        """
+        @param canvas: the BoardCanvas to draw on
+        @param dim: width and height of the board, in squares
+        @param on_click: called with the square clicked
+        """
+        self.canvas = canvas
+        self.dim = dim
+        self.on_click = on_click
+        # The square objects keyed by their Point, each knows its point as .indexes
+        self.squares = dict()
+        self._fills = dict()
+        self._knight = None
+        self._pawns = dict()
+        # Pawn pieces of a past game, put back on the board by the next one
+        self._spare_pawns = []
+        self._draw_pending = False
+        # Culling: the squares on the canvas, and the board bitmap with the RGB bytes it is made from
+        self._shown = set()
+        self._bitmap = None
+        self._pixels = None
+        self._pixels_dirty = False
+        self._rgb = dict()
+        canvas.Bind(FloatCanvas.EVT_LEFT_DOWN, self._on_left_down)
+        canvas.before_draw = self.update_viewport
+
+    @property
+    def culled(self):
+        return self.dim >= CULL_MIN_DIM
+
+    def build(self, knight, pawns):
+        """Adds the squares and pieces to the canvas
+
+        @param knight: the Knight
+        @param pawns: dict of Pawn, keyed the way the pieces will be asked to move
+        """
+        squares = []
+        for i in range(self.dim):
+            for j in range(self.dim):
+                point = Point(i, j)
+                point.set_graph_coord(i * CELLSPACING, j * CELLSPACING)
+                fill_color = EDGE_COLOR if self.is_edge(i, j) else SQUARE_COLOR
+                square = FloatCanvas.Rectangle(point.get_graph_coord(), (CELLWIDTH, CELLWIDTH),
+                                               FillColor=fill_color, LineStyle=None)
+                square.indexes = point
+                squares.append(square)
+                self.squares[point] = square
+                self._fills[(i, j)] = fill_color
+        if self.culled:
+            # update_viewport puts the squares in view on the canvas
+            self._pixels = bytearray(3 * self.dim * self.dim)
+            for coords, color in self._fills.items():
+                self._set_pixel(coords, color)
+        else:
+            self.canvas.AddObjects(squares)
+
+        # Pieces are in the foreground, over whatever squares come and go
+        self._knight = FloatCanvas.ScaledText(KNIGHT, self._piece_point((0, 0), 14), CELLWIDTH + 5,
+                                              Color="Black", Position="cc", InForeground=True)
+        self.canvas.AddObject(self._knight)
+        self.place_pieces(knight, pawns)
+
+    def reset(self, dim, knight, pawns):
+        """Sets the board up for a new game, reusing the squares and pieces when dim is unchanged"""
+        if dim != self.dim:
+            self.canvas.ClearAll()
+            self.dim = dim
+            self.squares = dict()
+            self._fills = dict()
+            self._pawns = dict()
+            self._spare_pawns = []
+            self._shown = set()
+            self._bitmap = None
+            self._pixels = None
+            self.build(knight, pawns)
+            return
+        for (i, j) in self._fills.keys():
+            self.set_fill((i, j), EDGE_COLOR if self.is_edge(i, j) else SQUARE_COLOR)
+        self._spare_pawns.extend(self._pawns.values())
+        self._pawns = dict()
+        self.place_pieces(knight, pawns)
+        # Whatever pieces the new game did not need go
+        for piece in self._spare_pawns:
+            self.canvas.RemoveObject(piece)
+        self._spare_pawns = []
+
+    def place_pieces(self, knight, pawns):
+        for key, pawn in pawns.items():
+            (x, y) = pawn.get_position()
+            self.add_pawn(key, (x, y))
+            pawn.set_graph_coord(x * CELLSPACING, y * CELLSPACING)
+        (x, y) = knight.get_position()
+        self.move_knight((x, y))
+        knight.set_graph_coord(x * CELLSPACING, y * CELLSPACING)
+
+    def square_at(self, (x, y)):
+        """The square under the world coordinates (x, y), None off the board or in the gap between squares"""
+        i, dx = divmod(x, CELLSPACING)
+        j, dy = divmod(y, CELLSPACING)
+        if not (0 <= i < self.dim and 0 <= j < self.dim) or dx > CELLWIDTH or dy > CELLWIDTH:
+            return None
+        return self.squares[(int(i), int(j))]
+
+    def _on_left_down(self, event):
+        square = self.square_at(event.Coords)
+        if square is not None:
+            self.on_click(square)
+
+    def zoom_to_board(self):
+        """Fits the whole board in view, whatever squares are on the canvas"""
+        size = self.dim * CELLSPACING
+        self.canvas.ZoomToBB(FloatCanvas.BBox.asBBox(((0, 0), (size, size))))
+
+    def update_viewport(self):
+        """Puts the squares in view on the canvas, or the board bitmap when they would be too small.
+
+        Called by the canvas before each draw, does nothing for a board small enough to keep whole.
+        """
+        if not self.culled:
+            return
+        if self.canvas.Scale * CELLSPACING < LOD_CELL_PIXELS:
+            self._show_squares(set())
+            self._show_bitmap()
+            return
+        self._hide_bitmap()
+        (min_x, min_y, max_x, max_y) = self.canvas.viewport()
+        first_i = max(0, int(min_x // CELLSPACING))
+        last_i = min(self.dim - 1, int(max_x // CELLSPACING))
+        first_j = max(0, int(min_y // CELLSPACING))
+        last_j = min(self.dim - 1, int(max_y // CELLSPACING))
+        self._show_squares(set((i, j) for i in range(first_i, last_i + 1) for j in range(first_j, last_j + 1)))
+
+    def _show_squares(self, in_view):
+        gone = self._shown - in_view
+        new = in_view - self._shown
+        if gone:
+            self.canvas.RemoveObjects([self.squares[coords] for coords in gone])
+        if new:
+            self.canvas.AddObjects([self.squares[coords] for coords in new])
+        self._shown = in_view
+
+    def _show_bitmap(self):
+        if self._bitmap is not None and not self._pixels_dirty:
+            return
+        self._hide_bitmap()
+        image = wx.ImageFromBuffer(self.dim, self.dim, self._pixels)
+        # One pixel per square, scaled up to cover the board, row 0 of the image at the top
+        self._bitmap = FloatCanvas.ScaledBitmap(wx.BitmapFromImage(image), (0, 0), self.dim * CELLSPACING,
+                                                Position="bl")
+        self.canvas.AddObject(self._bitmap)
+        self._pixels_dirty = False
+
+    def _hide_bitmap(self):
+        if self._bitmap is not None:
+            self.canvas.RemoveObject(self._bitmap)
+            self._bitmap = None
+
+    def _set_pixel(self, (x, y), color):
+        rgb = self._rgb.get(color)
+        if rgb is None:
+            if isinstance(color, tuple):
+                rgb = color
+            else:
+                colour = wx.NamedColour(color)
+                rgb = (colour.Red(), colour.Green(), colour.Blue())
+            self._rgb[color] = rgb
+        offset = 3 * ((self.dim - 1 - y) * self.dim + x)
+        self._pixels[offset:offset + 3] = bytearray(rgb)
+        self._pixels_dirty = True
+
+    def is_edge(self, x, y):
+        return x == 0 or x == self.dim - 1 or y == 0 or y == self.dim - 1
+
+    def set_fill(self, coords, color):
+        """Recolours the square at coords, if it is not that colour already"""
+        if self._fills.get(coords) == color:
+            return
+        self._fills[coords] = color
+        self.squares[coords].SetFillColor(color)
+        if self._pixels is not None:
+            self._set_pixel(coords, color)
+        self.request_draw()
+
+    def move_knight(self, coords):
+        self._knight.SetPoint(self._piece_point(coords, 14))
+        self.request_draw()
+
+    def add_pawn(self, key, coords):
+        if self._spare_pawns:
+            piece = self._spare_pawns.pop()
+            piece.SetPoint(self._piece_point(coords, 15))
+        else:
+            piece = self.canvas.AddScaledText(PAWN, self._piece_point(coords, 15), CELLWIDTH + 5,
+                                              Color="Black", Position="cc", InForeground=True)
+        self._pawns[key] = piece
+        self.request_draw()
+
+    def move_pawn(self, key, coords):
+        self._pawns[key].SetPoint(self._piece_point(coords, 15))
+        self.request_draw()
+
+    def remove_pawn(self, key):
+        piece = self._pawns.pop(key, None)
+        if piece is not None:
+            self.canvas.RemoveObject(piece)
+            self.request_draw()
+
+    def request_draw(self):
+        """Asks for a redraw once the current event is handled, however many changes it makes"""
+        if not self._draw_pending:
+            self._draw_pending = True
+            wx.CallAfter(self.draw)
+
+    def draw(self):
+        """Redraws the canvas now"""
+        self._draw_pending = False
+        if self.canvas:
+            self.canvas.Draw(Force=True)
+
+    @staticmethod
+    def _piece_point((x, y), offset):
+        # The piece glyphs are centred a little off the corner of their square
+        return x * CELLSPACING + 15, y * CELLSPACING + offset
@@ -0,0 +1,1083 @@
+"""Headless search engine for the knights game.
+
+Everything here works on plain board coordinates and square ids, so it can be
+imported (and run) without wxPython or a display.
+"""
+import random
+import sys
+import time
+from collections import deque
+from heapq import heapify, heappush, heappop, nsmallest
+from math import sqrt
+
+from cache import puzzle_key
+from constants import SPAWNPADDING
+from knight import Knight, UNREACHABLE, get_distance_table, get_move_table
+from pawn import LEFT, OPPOSITE_DIRECTIONS, Pawn
+from spatial import PawnIndex, PawnSet
+from statespace import StateSpaceNode, StateSpaceNodeDFS, StateSpaceNodeAStar
+import symmetry
+from zobrist import ZobristKeys
+
+BFS = 'bfs'
+DFS = 'dfs'
+ASTAR = 'astar'
+IDASTAR = 'idastar'
+HDASTAR = 'hdastar'
+ANYTIME = 'anytime'
+BEAM = 'beam'
+PACKED_BFS = 'packed_bfs'
+LAYERED_BFS = 'layered_bfs'
+FRONTIER_BFS = 'frontier_bfs'
+EXTERNAL_BFS = 'external_bfs'
+ALGORITHMS = (BFS, DFS, ASTAR, IDASTAR, HDASTAR, ANYTIME, BEAM, PACKED_BFS, LAYERED_BFS, FRONTIER_BFS,
+              EXTERNAL_BFS)
+
+# Heuristics that never look at the quadrants, the children are scored without working them out
+NO_QUADRANT_HEURISTICS = frozenset(['h4'])
+# Heuristic weights the anytime search goes through, the last one being plain A*
+ANYTIME_WEIGHTS = (5, 3, 2, 1.5, 1)
+# Nodes the beam search keeps per depth
+BEAM_WIDTH = 256
+# Depths the beam search remembers the states of, so the knight does not walk in short circles
+BEAM_SEEN_DEPTHS = 8
+# Pawns from which a Solver builds the spatial index unless told otherwise
+SPATIAL_MIN_PAWNS = 16
+# Pawn states a Solver remembers the pawn ids of, it starts over past that so IDA* stays small
+PAWN_STATE_CACHE_SIZE = 4096
+
+# Where SearchStats charges the time of a profiled search
+MOVE_GENERATION = 'move_generation'
+HEURISTIC = 'heuristic'
+DEDUPE = 'dedupe'
+QUEUE = 'queue'
+PHASES = (MOVE_GENERATION, HEURISTIC, DEDUPE, QUEUE)
+
+
+def count_pawns(pawns):
+    """Number of pawns in a pawn state, either a bitmask or a set"""
+    if isinstance(pawns, (int, long)):
+        return bin(pawns).count('1')
+    return len(pawns)
+
+
+def build_coord_mappings(dim):
+    """Numbers every square of the board the same way the game canvas does"""
+    coord_to_int_mappings = dict()
+    int_to_coord_mappings = dict()
+    mapping_num = 1
+    for i in range(dim):
+        for j in range(dim):
+            coord_to_int_mappings[(i, j)] = mapping_num
+            int_to_coord_mappings[mapping_num] = (i, j)
+            mapping_num += 1
+    return coord_to_int_mappings, int_to_coord_mappings
+
+
+def generate_starting_locations(dim, number_of_pawns, rng=random):
+    """Places a knight and number_of_pawns pawns, all walking the same way, at random.
+
+    Pass a seeded random.Random as rng to get the same board back every time.
+    Returns the Knight and a dict of Pawn keyed by their (x, y).
+    """
+    if number_of_pawns > (dim - 2 * SPAWNPADDING) ** 2 - 9:
+        raise ValueError("%d pawns do not fit on a %dx%d board" % (number_of_pawns, dim, dim))
+    x = rng.randint(1, dim - 2)
+    y = rng.randint(1, dim - 2)
+    knight = Knight(x, y, dim)
+    valid_knight_moves = knight.get_valid_moves()
+    d = rng.randint(0, 3)
+    pawns = dict()
+    for i in range(number_of_pawns):
+        while True:
+            x = rng.randint(SPAWNPADDING, dim - SPAWNPADDING - 1)
+            y = rng.randint(SPAWNPADDING, dim - SPAWNPADDING - 1)
+            pawn = Pawn(x, y, dim, d)
+            if pawn not in pawns and pawn.get_position() != knight.get_position() \
+                    and pawn not in valid_knight_moves:
+                pawns[pawn.get_position()] = pawn
+                break
+    return knight, pawns
+
+
+def describe_pawns(pawns):
+    """Turns Pawn objects into the (x, y, direction) list the Solver takes.
+
+    A Solver pawn takes its forward step first. A pawn on its way back (move_fwd False) is the same
+    as one starting out the other way from where it stands, so that is how it is described.
+    """
+    described = []
+    for pawn in pawns:
+        direction = pawn.direction
+        if not pawn.move_fwd:
+            # Pawn.move sends anything it does not know right
+            direction = OPPOSITE_DIRECTIONS.get(direction, LEFT)
+        described.append((pawn.point.x, pawn.point.y, direction))
+    return described
+
+
+class SearchStats(object):
+    """Counters and timers collected while a solver runs.
+
+    @param callback: called with these stats every callback_interval expanded nodes, with
+                     frontier_size, closed_size and depth describing the search at that moment.
+                     An exception raised from it aborts the search.
+    @param profile: time the phases of the search (PHASES) as well, which costs a few clock reads per node
+    """
+
+    def __init__(self, callback=None, callback_interval=10000, profile=False):
+        self.nodes_opened = 0
+        self.nodes_generated = 0
+        self.nodes_put = 0
+        self.caught_pawns = 0
+        self.elapsed = 0.0
+        self.depth = 0
+        self.max_depth = 0
+        self.frontier_size = 0
+        self.closed_size = 0
+        self.peak_frontier = 0
+        self.peak_closed = 0
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.profile = profile
+        self.callback = callback
+        self.callback_interval = callback_interval
+        # The solvers compare nodes_opened against this, -1 never matches
+        self.next_checkpoint = callback_interval if callback else -1
+        self._lap_started = time.time()
+
+    def checkpoint(self, frontier_size, closed_size, depth):
+        self._record(frontier_size, closed_size, depth)
+        self.next_checkpoint += self.callback_interval
+        self.callback(self)
+
+    def finish(self, frontier_size, closed_size, depth):
+        self._record(frontier_size, closed_size, depth)
+
+    def _record(self, frontier_size, closed_size, depth):
+        self.frontier_size = frontier_size
+        self.closed_size = closed_size
+        self.depth = depth
+        self.peak_frontier = max(self.peak_frontier, frontier_size)
+        self.peak_closed = max(self.peak_closed, closed_size)
+        self.max_depth = max(self.max_depth, depth)
+
+    def lap(self, phase=None):
+        """Charges the time since the previous lap to phase"""
+        now = time.time()
+        if phase is not None:
+            self.phase_times[phase] += now - self._lap_started
+        self._lap_started = now
+
+    def merge(self, counters):
+        """Adds the counters of another search, e.g. a worker process, to these"""
+        for counter in ('nodes_opened', 'nodes_generated', 'nodes_put', 'caught_pawns'):
+            setattr(self, counter, getattr(self, counter) + counters[counter])
+        for counter in ('max_depth', 'peak_frontier', 'peak_closed'):
+            setattr(self, counter, max(getattr(self, counter), counters[counter]))
+        for phase, seconds in counters.get('phase_times', {}).items():
+            self.phase_times[phase] += seconds
+
+    def as_dict(self):
+        counters = dict((name, getattr(self, name)) for name in
+                        ('nodes_opened', 'nodes_generated', 'nodes_put', 'caught_pawns', 'elapsed',
+                         'max_depth', 'peak_frontier', 'peak_closed'))
+        if self.profile:
+            counters['phase_times'] = dict(self.phase_times)
+        return counters
+
+
+class SearchResult(object):
+    """Outcome of a search: the knight's moves in order and how we got there"""
+
+    def __init__(self, algorithm, moves, stats, goal_node=None, solved=None, cached=False):
+        self.algorithm = algorithm
+        self.moves = moves
+        self.stats = stats
+        self.goal_node = goal_node
+        self.solved = goal_node is not None if solved is None else solved
+        # Looked up in a SolutionCache rather than searched for, stats then counts nothing
+        self.cached = cached
+
+    def is_solved(self):
+        return self.solved
+
+    def __len__(self):
+        return len(self.moves)
+
+
+class Solver(object):
+    """Solves one puzzle.
+
+    @param dim: width and height of the board, including the grey border
+    @param knight: (x, y) square of the knight
+    @param pawns: iterable of (x, y, direction) with the directions from pawn.py
+    @param bitmask: keep the pawns still alive as one integer, pawn i being bit i,
+                    instead of a set of the squares the pawns started on
+    @param knight_distance: have h1/h2/h3 measure the distance to a pawn in knight moves
+                            (from the cached distance table) instead of straight line squares
+    @param vectorized: score the children of a node all at once with NumPy (see vectorized.py),
+                       for the heuristics that have a batched version. None does so where that is
+                       faster, when NumPy is installed.
+    @param spatial: answer the nearest pawn and pawns per quadrant questions of h1 and h2 from
+                    a spatial index (see spatial.py), bitmask mode only. None does so from
+                    SPATIAL_MIN_PAWNS pawns on.
+    """
+
+    def __init__(self, dim, knight, pawns, bitmask=True, knight_distance=False, vectorized=None, spatial=None):
+        self.dim = dim
+        self.bitmask = bitmask
+        self.knight_distance = knight_distance
+        self.scale = dim
+        self.coord_to_int_mappings, self.int_to_coord_mappings = build_coord_mappings(dim)
+        self.move_table = get_move_table(dim)
+        self.distance_table = get_distance_table(dim)
+        self.knight_id = self.coord_to_int_mappings[tuple(knight)]
+        self.knight = tuple(knight)
+        self.pawns = [tuple(pawn) for pawn in pawns]
+
+        # Map out pawns out for search, as we represent each location of the pawn with integer
+        # A pawn is known by the square id it starts on, both squares it oscillates between point back to it
+        self.pawn_int_possible_locations_mapping = dict()
+        self.pawn_squares = dict()
+        self.pawns_on_the_board = []
+        for (x, y, direction) in self.pawns:
+            s, e = Pawn(x, y, dim, direction).get_tuple_possible_moves()
+            starting_int_location_representation = self.coord_to_int_mappings[s]
+            ending_int_location_representation = self.coord_to_int_mappings[e]
+            self.pawn_int_possible_locations_mapping[starting_int_location_representation] = \
+                [starting_int_location_representation]
+            # It is possible that two pawns end up at the same "second" location, but not first
+            # If this happens, we catch them all.
+            if ending_int_location_representation in self.pawn_int_possible_locations_mapping:
+                self.pawn_int_possible_locations_mapping[ending_int_location_representation] \
+                    .append(starting_int_location_representation)
+            else:
+                self.pawn_int_possible_locations_mapping[ending_int_location_representation] = \
+                    [starting_int_location_representation]
+            self.pawn_squares[starting_int_location_representation] = \
+                (starting_int_location_representation, ending_int_location_representation)
+            self.pawns_on_the_board.append(starting_int_location_representation)
+
+        # The pawn state of a node is never changed in place, so children can share their parent's state.
+        # Catching pawns is "state & capture_masks[square]" then "state ^ caught" in both modes.
+        if bitmask:
+            pawn_masks = dict((pawn, 1 << index) for index, pawn in enumerate(self.pawns_on_the_board))
+            no_pawns = 0
+            self.root_pawns = (1 << len(self.pawns_on_the_board)) - 1
+        else:
+            pawn_masks = dict((pawn, frozenset([pawn])) for pawn in self.pawns_on_the_board)
+            no_pawns = frozenset()
+            self.root_pawns = frozenset(self.pawns_on_the_board)
+
+        # occupancy[step % 2][square] are the pawns standing on square after that many knight moves,
+        # Pawn.move taking every pawn from its first square to the other one and back
+        self.occupancy = (dict(), dict())
+        for pawn, squares in self.pawn_squares.items():
+            for parity, square in enumerate(squares):
+                self.occupancy[parity][square] = self.occupancy[parity].get(square, no_pawns) | pawn_masks[pawn]
+        # Landing on a square with move k catches the pawns standing there (step k - 1) and the ones
+        # walking into the knight right after (step k), occupancy[0] | occupancy[1] whatever the parity
+        # of k. So the parity needs no place in the state key, only the start square is special,
+        # the knight catches nothing there (see _catch_pawns).
+        self.capture_masks = dict(self.occupancy[0])
+        for square, mask in self.occupancy[1].items():
+            self.capture_masks[square] = self.capture_masks.get(square, no_pawns) | mask
+        # The most pawns a single landing can catch, what h4 divides the pawns left by
+        self.max_catch = max([count_pawns(mask) for mask in self.capture_masks.values()] or [1])
+        self._mask_to_pawns = dict()
+        self._pawns_to_mask = dict()
+        # Nodes are hashed by Zobrist key, the key of a child is worked out from its parent's
+        self.zobrist = ZobristKeys(self)
+        self.root_key = self.zobrist.key(self.knight_id, self.root_pawns)
+        self.pawn_index = None
+        if spatial is None:
+            spatial = bitmask and len(self.pawns_on_the_board) >= SPATIAL_MIN_PAWNS
+        if spatial:
+            if not bitmask:
+                raise ValueError("The spatial index works on pawn bitmasks")
+            self.pawn_index = PawnIndex(self)
+        self.batch_heuristics = None
+        if vectorized or vectorized is None:
+            try:
+                from vectorized import BatchHeuristics
+            except ImportError:
+                if vectorized:
+                    raise
+            else:
+                self.batch_heuristics = BatchHeuristics(self, always=bool(vectorized))
+
+    def solve(self, algorithm=ASTAR, stats=None, cache=None, **options):
+        """Runs one of the ALGORITHMS, filling in stats (a SearchStats) if given
+
+        @param cache: a cache.SolutionCache, looked into before searching and told the result after.
+                      Entries are shared between the rotations and reflections of a board.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError("Unknown search algorithm %r" % (algorithm,))
+        started = time.time()
+        if cache is not None:
+            # Mirrored and rotated boards share one entry, stored the way the canonical board sees it
+            transform, knight, pawns = symmetry.canonicalize(self.dim, self.knight, self.pawns)
+            key_options = dict((name, value) for name, value in options.items() if not callable(value))
+            # The settings of the solver that change the plan it finds, vectorized and spatial only change the speed
+            key_options.update(bitmask=self.bitmask, knight_distance=self.knight_distance)
+            key = puzzle_key(self.dim, knight, pawns, algorithm, key_options)
+            cached = cache.get(key)
+            if cached is not None:
+                solved, moves = cached
+                moves = symmetry.transform_moves(symmetry.INVERSES[transform], self.dim, moves)
+                result = SearchResult(algorithm, moves, stats or SearchStats(), solved=solved, cached=True)
+                result.stats.elapsed = time.time() - started
+                if solved and options.get('on_solution'):
+                    options['on_solution'](result)
+                return result
+        result = getattr(self, algorithm)(stats=stats, **options)
+        result.stats.elapsed = time.time() - started
+        if cache is not None:
+            cache.put(key, result.is_solved(), symmetry.transform_moves(transform, self.dim, result.moves))
+        return result
+
+    def _catch_pawns(self, position, pawns_alive, depth):
+        """Returns the pawns still alive that the knight catches by landing on position with move depth"""
+        if not depth:
+            # Standing on its first square catches nothing, pawns only get caught by the knight landing
+            return 0
+        capture_mask = self.capture_masks.get(position)
+        if capture_mask is None:
+            return 0
+        return pawns_alive & capture_mask
+
+    def _has_unreachable_pawn(self):
+        """Whether a pawn alive at the start has no square the knight can ever get to"""
+        for pawn in self.pawns_on_the_board:
+            if all(self.distance_table.distances_to(square)[self.knight_id] == UNREACHABLE
+                   for square in self.pawn_squares[pawn]):
+                return True
+        return False
+
+    def _pawn_ids(self, pawns_alive):
+        """Returns the starting square ids of the pawns alive in a pawn state"""
+        if not self.bitmask:
+            return pawns_alive
+        pawn_ids = self._mask_to_pawns.get(pawns_alive)
+        if pawn_ids is None:
+            if len(self._mask_to_pawns) >= PAWN_STATE_CACHE_SIZE:
+                self._mask_to_pawns.clear()
+                self._pawns_to_mask.clear()
+            pawn_ids = frozenset(p for i, p in enumerate(self.pawns_on_the_board) if pawns_alive >> i & 1)
+            self._mask_to_pawns[pawns_alive] = pawn_ids
+            self._pawns_to_mask[pawn_ids] = pawns_alive
+        return pawn_ids
+
+    def _build_result(self, algorithm, goal_node, stats):
+        moves = []
+        node = goal_node
+        while node is not None and node.parent is not None:
+            moves.append(self.int_to_coord_mappings[node.path_id])
+            node = node.parent
+        moves.reverse()
+        return SearchResult(algorithm, moves, stats, goal_node)
+
+    def bfs(self, stats=None):
+        stats = stats or SearchStats()
+        lap = stats.lap if stats.profile else None
+
+        q = deque()
+        q.append(StateSpaceNode(None, self.knight_id, 0, self.root_pawns, self.root_key))
+        goal_node = None
+        current_node = q[0]
+
+        # All the states that ever passed.
+        state_history = set()
+
+        while len(q) != 0:
+            stats.nodes_opened += 1
+            if stats.nodes_opened == stats.next_checkpoint:
+                stats.checkpoint(len(q), len(state_history), current_node.depth)
+            if len(q) > stats.peak_frontier:
+                stats.peak_frontier = len(q)
+            if lap:
+                lap()
+            current_node = q.popleft()
+            if lap:
+                lap(QUEUE)
+            current_position = current_node.path_id
+            pawns_alive = current_node.int_position_pawns_caught
+
+            # Check if we caught a pawn at this position, the start with no pawns at all is a goal too
+            pawns_caught = self._catch_pawns(current_position, pawns_alive, current_node.depth)
+            if pawns_caught:
+                stats.caught_pawns += count_pawns(pawns_caught)
+                pawns_alive ^= pawns_caught
+            if not pawns_alive:
+                goal_node = current_node
+                break
+
+            # Every square the knight can jump to from here, straight from the precomputed table
+            cur_valid_moves = self.move_table.neighbours[current_position]
+            new_depth = current_node.depth + 1
+            move_key = self.zobrist.move_key(current_node.key, current_position, pawns_caught)
+            square_words = self.zobrist.squares
+
+            # Build new Nodes for all the discovered valid moves
+            for path_id in cur_valid_moves:
+                new_node = StateSpaceNode(current_node, path_id, new_depth, pawns_alive,
+                                          move_key ^ square_words[path_id])
+                stats.nodes_generated += 1
+                if lap:
+                    lap(MOVE_GENERATION)
+                if new_node in state_history:
+                    if lap:
+                        lap(DEDUPE)
+                    continue
+                state_history.add(new_node)
+                if lap:
+                    lap(DEDUPE)
+                q.append(new_node)
+                stats.nodes_put += 1
+                if lap:
+                    lap(QUEUE)
+
+        stats.finish(len(q), len(state_history), current_node.depth)
+        return self._build_result(BFS, goal_node, stats)
+
+    def packed_bfs(self, stats=None):
+        """BFS keeping its states as packed integers in arrays rather than nodes, see packedbfs.py"""
+        import packedbfs
+        stats = stats or SearchStats()
+        path = packedbfs.packed_bfs(self, stats)
+        if path is None:
+            return SearchResult(PACKED_BFS, [], stats, solved=False)
+        return SearchResult(PACKED_BFS, [self.int_to_coord_mappings[square] for square in path], stats, solved=True)
+
+    def layered_bfs(self, stats=None):
+        """BFS expanding a whole depth at a time with NumPy, see layeredbfs.py.
+
+        The callback of stats is called at most once per depth.
+        """
+        import layeredbfs
+        stats = stats or SearchStats()
+        path = layeredbfs.layered_bfs(self, stats)
+        if path is None:
+            return SearchResult(LAYERED_BFS, [], stats, solved=False)
+        return SearchResult(LAYERED_BFS, [self.int_to_coord_mappings[square] for square in path], stats, solved=True)
+
+    def frontier_bfs(self, stats=None):
+        """BFS keeping only the last depths in memory, see frontierbfs.py.
+
+        stats add up the search for the goal and the ones rebuilding the path to it.
+        """
+        import frontierbfs
+        stats = stats or SearchStats()
+        path = frontierbfs.frontier_bfs(self, stats)
+        if path is None:
+            return SearchResult(FRONTIER_BFS, [], stats, solved=False)
+        return SearchResult(FRONTIER_BFS, [self.int_to_coord_mappings[square] for square in path], stats, solved=True)
+
+    def external_bfs(self, directory=None, chunk_states=None, stats=None):
+        """BFS with its depths in files on disk, see externalbfs.py.
+
+        @param directory: where the files go, the system temporary directory if None
+        @param chunk_states: states held in memory at once, externalbfs.CHUNK_STATES if None
+        """
+        import externalbfs
+        stats = stats or SearchStats()
+        path = externalbfs.external_bfs(self, stats, directory, chunk_states or externalbfs.CHUNK_STATES)
+        if path is None:
+            return SearchResult(EXTERNAL_BFS, [], stats, solved=False)
+        return SearchResult(EXTERNAL_BFS, [self.int_to_coord_mappings[square] for square in path], stats, solved=True)
+
+    def dfs(self, stats=None):
+        stats = stats or SearchStats()
+        lap = stats.lap if stats.profile else None
+
+        q = []
+        q.append(StateSpaceNodeDFS(None, self.knight_id, 0, self.root_pawns, key=self.root_key))
+        goal_node = None
+        current_node = q[0]
+
+        # All the states that ever passed.
+        state_history = set()
+
+        while len(q) != 0:
+            stats.nodes_opened += 1
+            if stats.nodes_opened == stats.next_checkpoint:
+                stats.checkpoint(len(q), len(state_history), current_node.depth)
+            if len(q) > stats.peak_frontier:
+                stats.peak_frontier = len(q)
+            if lap:
+                lap()
+            current_node = q.pop()
+            if lap:
+                lap(QUEUE)
+            current_position = current_node.path_id
+            pawns_alive = current_node.int_position_pawns_caught
+
+            # Check if we caught a pawn at this position, the start with no pawns at all is a goal too
+            pawns_caught = self._catch_pawns(current_position, pawns_alive, current_node.depth)
+            if pawns_caught:
+                stats.caught_pawns += count_pawns(pawns_caught)
+                pawns_alive ^= pawns_caught
+            if not pawns_alive:
+                goal_node = current_node
+                break
+
+            # Every square the knight can jump to from here, straight from the precomputed table
+            cur_valid_moves = self.move_table.neighbours[current_position]
+
+            # DFS will require some smart choices if possible, pawn squares go last so they pop first
+            captureable_pawns = [path for path in cur_valid_moves if path in self.pawn_int_possible_locations_mapping]
+            if len(captureable_pawns) > 0:
+                temp_valid_moves = []
+                for path in cur_valid_moves:
+                    if path not in self.pawn_int_possible_locations_mapping:
+                        temp_valid_moves.append(path)
+                temp_valid_moves.extend(captureable_pawns)
+                cur_valid_moves = temp_valid_moves
+
+            move_key = self.zobrist.move_key(current_node.key, current_position, pawns_caught)
+            square_words = self.zobrist.squares
+
+            # Build new Nodes for all the discovered valid moves
+            for path_id in cur_valid_moves:
+                new_node = StateSpaceNodeDFS(current_node, path_id, current_node.depth + 1,
+                                             pawns_alive, current_node.path_id, move_key ^ square_words[path_id])
+                stats.nodes_generated += 1
+                if lap:
+                    lap(MOVE_GENERATION)
+                if new_node in state_history:
+                    if lap:
+                        lap(DEDUPE)
+                    continue
+                state_history.add(new_node)
+                if lap:
+                    lap(DEDUPE)
+                stats.nodes_put += 1
+                q.append(new_node)
+                if lap:
+                    lap(QUEUE)
+
+        stats.finish(len(q), len(state_history), current_node.depth)
+        return self._build_result(DFS, goal_node, stats)
+
+    def astar(self, heuristic='h1', stats=None):
+        stats = stats or SearchStats()
+        lap = stats.lap if stats.profile else None
+        h = getattr(self, heuristic)
+
+        heap = []
+        root_node = StateSpaceNodeAStar(None, self.knight_id, 0, self.root_pawns, key=self.root_key)
+        heappush(heap, root_node)
+        goal_node = None
+        current_node = root_node
+
+        closed_set = dict()
+        closed_set[root_node] = 0
+
+        while len(heap) != 0:
+            stats.nodes_opened += 1
+            if stats.nodes_opened == stats.next_checkpoint:
+                stats.checkpoint(len(heap), len(closed_set), current_node.depth)
+            if len(heap) > stats.peak_frontier:
+                stats.peak_frontier = len(heap)
+            if lap:
+                lap()
+            current_node = heappop(heap)
+            if lap:
+                lap(QUEUE)
+            children = self._expand_astar_node(current_node, h, stats)
+            if children is None:
+                goal_node = current_node
+                break
+
+            for new_node in children:
+                if new_node not in closed_set or new_node.cost < closed_set[new_node]:
+                    closed_set[new_node] = new_node.cost
+                    if lap:
+                        lap(DEDUPE)
+                    heappush(heap, new_node)
+                    stats.nodes_put += 1
+                    if lap:
+                        lap(QUEUE)
+                elif lap:
+                    lap(DEDUPE)
+
+        stats.finish(len(heap), len(closed_set), current_node.depth)
+        return self._build_result(ASTAR, goal_node, stats)
+
+    def idastar(self, heuristic='h1', stats=None):
+        """A* that keeps nothing but the current path, re-searching with a growing cost threshold.
+
+        Nodes are expanded exactly like astar does, the only states remembered are the ones on the
+        path, to stop the knight from walking in circles. The frontier and closed sizes reported in
+        the stats are the length of that path. The pawn state caches the expansion uses are bounded
+        (PAWN_STATE_CACHE_SIZE), so beyond a constant, memory only grows with the depth of the path.
+        """
+        stats = stats or SearchStats()
+        lap = stats.lap if stats.profile else None
+        h = getattr(self, heuristic)
+        root_node = StateSpaceNodeAStar(None, self.knight_id, 0, self.root_pawns, key=self.root_key)
+        threshold = root_node.priority
+        if self._has_unreachable_pawn():
+            # Without a closed set nothing else would tell, every pass would only raise the threshold
+            stats.finish(0, 0, 0)
+            return self._build_result(IDASTAR, None, stats)
+
+        while True:
+            next_threshold = sys.maxint
+            path = [root_node]
+            on_path = set(path)
+            stats.nodes_opened += 1
+            root_children = self._expand_astar_node(root_node, h, stats)
+            if root_children is None:
+                stats.finish(1, 1, 0)
+                return self._build_result(IDASTAR, root_node, stats)
+            children_to_visit = [iter(sorted(root_children))]
+
+            while children_to_visit:
+                for new_node in children_to_visit[-1]:
+                    if lap:
+                        lap()
+                    if new_node in on_path:
+                        if lap:
+                            lap(DEDUPE)
+                        continue
+                    if lap:
+                        lap(DEDUPE)
+                    if new_node.priority > threshold:
+                        next_threshold = min(next_threshold, new_node.priority)
+                        continue
+                    stats.nodes_opened += 1
+                    if stats.nodes_opened == stats.next_checkpoint:
+                        stats.checkpoint(len(path), len(on_path), new_node.depth)
+                    if len(path) > stats.peak_frontier:
+                        stats.peak_frontier = len(path)
+                    children = self._expand_astar_node(new_node, h, stats)
+                    if children is None:
+                        stats.finish(len(path), len(on_path), new_node.depth)
+                        return self._build_result(IDASTAR, new_node, stats)
+                    stats.nodes_put += 1
+                    path.append(new_node)
+                    on_path.add(new_node)
+                    if lap:
+                        lap()
+                    children_to_visit.append(iter(sorted(children)))
+                    if lap:
+                        lap(QUEUE)
+                    break
+                else:
+                    children_to_visit.pop()
+                    on_path.discard(path.pop())
+
+            if next_threshold == sys.maxint:
+                stats.finish(0, 0, 0)
+                return self._build_result(IDASTAR, None, stats)
+            threshold = next_threshold
+
+    def hdastar(self, heuristic='h1', processes=None, optimal=True, stats=None):
+        """A* spread over several processes, see parallel.py.
+
+        The workers keep their own stats, they are added up once the search is over, so the
+        callback of stats is never called.
+        """
+        import parallel
+        stats = stats or SearchStats()
+        path, worker_stats = parallel.hda_star(self, heuristic, processes, optimal, stats.profile)
+        for counters in worker_stats:
+            stats.merge(counters)
+        goal_node = None
+        if path is not None:
+            goal_node = StateSpaceNodeAStar(None, self.knight_id, 0, self.root_pawns, key=self.root_key)
+            for depth, path_id in enumerate(path):
+                goal_node = StateSpaceNodeAStar(goal_node, path_id, depth + 1, 0, 0, depth + 1)
+        return self._build_result(HDASTAR, goal_node, stats)
+
+    def anytime(self, heuristic='h4', weights=ANYTIME_WEIGHTS, first_heuristic='h1', on_solution=None, stats=None):
+        """Runs improve_solutions to the end and returns the best plan it found.
+
+        @param on_solution: called with every SearchResult better than the ones before
+        """
+        stats = stats or SearchStats()
+        result = None
+        for result in self.improve_solutions(heuristic, weights, first_heuristic, stats):
+            if on_solution:
+                on_solution(result)
+        if result is None:
+            result = self._build_result(ANYTIME, None, stats)
+        return result
+
+    def improve_solutions(self, heuristic='h4', weights=ANYTIME_WEIGHTS, first_heuristic='h1', stats=None):
+        """Generates ever shorter plans, ARA* style, the first one usually after very few expansions.
+
+        The first plan comes from weighted A* with first_heuristic and the first weight. h1 heads
+        straight for the nearest pawn and gets there after tens of expansions, where h4 weighs every
+        pawn left and can take thousands. The search then starts over with heuristic, dropping every
+        node that cannot beat that plan. None, or the same heuristic, skips that first step.
+
+        Weighted A* is run with every weight in turn, the heuristic counting weight times. Each pass
+        continues from the open nodes of the one before, plus the nodes that got cheaper after they had
+        been expanded, and stops once no open node can beat the best plan so far. With the last weight
+        at 1 and a consistent heuristic, like the default h4, the last plan is the shortest. h1, h2 and
+        h3 overestimate, with them the last plan is only the best this search came across.
+
+        Yields a SearchResult each time a shorter plan turns up, all of them sharing stats.
+        """
+        stats = stats or SearchStats()
+        started = time.time()
+        best_cost = sys.maxint
+        if first_heuristic and first_heuristic != heuristic:
+            for result in self._weighted_passes(getattr(self, first_heuristic), weights[:1], best_cost, stats,
+                                                started):
+                best_cost = len(result)
+                yield result
+                break
+        for result in self._weighted_passes(getattr(self, heuristic), weights, best_cost, stats, started):
+            yield result
+
+    def _weighted_passes(self, h, weights, best_cost, stats, started):
+        """The passes of improve_solutions with heuristic h, yielding the plans shorter than best_cost"""
+        lap = stats.lap if stats.profile else None
+
+        root_node = StateSpaceNodeAStar(None, self.knight_id, 0, self.root_pawns, key=self.root_key)
+        # Cheapest cost each state has been reached with
+        costs = {root_node: 0}
+        # Nodes that got cheaper after being expanded in the current pass, they are opened again in the next one
+        inconsistent = []
+        open_nodes = [root_node]
+        sequence = 0
+        current_node = root_node
+
+        for weight in weights:
+            heap = []
+            for node in open_nodes + inconsistent:
+                if costs[node] == node.cost:
+                    sequence += 1
+                    heap.append((node.cost + weight * (node.priority - node.cost), sequence, node))
+            heapify(heap)
+            inconsistent = []
+            closed_set = set()
+
+            while heap and heap[0][0] < best_cost:
+                stats.nodes_opened += 1
+                if stats.nodes_opened == stats.next_checkpoint:
+                    stats.checkpoint(len(heap), len(costs), current_node.depth)
+                if len(heap) > stats.peak_frontier:
+                    stats.peak_frontier = len(heap)
+                if lap:
+                    lap()
+                current_node = heappop(heap)[2]
+                if lap:
+                    lap(QUEUE)
+                if costs[current_node] < current_node.cost or current_node in closed_set:
+                    continue
+                closed_set.add(current_node)
+                children = self._expand_astar_node(current_node, h, stats)
+                if children is None:
+                    if current_node.cost < best_cost:
+                        best_cost = current_node.cost
+                        stats.finish(len(heap), len(costs), current_node.depth)
+                        stats.elapsed = time.time() - started
+                        yield self._build_result(ANYTIME, current_node, stats)
+                    continue
+
+                for new_node in children:
+                    # Plain f, no weight: a node that cannot beat the best plan never will
+                    if new_node.priority >= best_cost:
+                        continue
+                    if new_node not in costs or new_node.cost < costs[new_node]:
+                        costs[new_node] = new_node.cost
+                        if lap:
+                            lap(DEDUPE)
+                        if new_node in closed_set:
+                            inconsistent.append(new_node)
+                        else:
+                            sequence += 1
+                            heappush(heap, (new_node.cost + weight * (new_node.priority - new_node.cost),
+                                            sequence, new_node))
+                            stats.nodes_put += 1
+                        if lap:
+                            lap(QUEUE)
+                    elif lap:
+                        lap(DEDUPE)
+
+            open_nodes = [node for (key, s, node) in heap]
+
+        stats.finish(0, len(costs), 0)
+
+    def beam(self, heuristic='h4', width=BEAM_WIDTH, stats=None):
+        """Breadth first, keeping only the width most promising children at every depth.
+
+        Children are ranked by the pawns they have left, then by their A* priority. Ranking by
+        priority alone lets the beam drift around the board once the pawns left are far apart.
+
+        Work and memory are bounded by width: a state is not kept again while it is in the beam of
+        one of the last BEAM_SEEN_DEPTHS depths, so the knight does not walk in short circles, and
+        older beams are forgotten. That costs completeness and optimality, the beam can drop every
+        path to the goal. It gives up past pawns times squares moves, which is more than a shortest
+        plan takes, as no shortest path between two captures visits a square twice.
+        """
+        stats = stats or SearchStats()
+        lap = stats.lap if stats.profile else None
+        h = getattr(self, heuristic)
+
+        root_node = StateSpaceNodeAStar(None, self.knight_id, 0, self.root_pawns, key=self.root_key)
+        beam = [root_node]
+        seen = {root_node}
+        # The beams whose states are in seen, the oldest first
+        seen_beams = deque([beam])
+        max_depth = len(self.pawns_on_the_board) * self.move_table.size
+        depth = 0
+
+        while beam and depth <= max_depth:
+            if len(beam) > stats.peak_frontier:
+                stats.peak_frontier = len(beam)
+            children = []
+            for current_node in beam:
+                stats.nodes_opened += 1
+                if stats.nodes_opened == stats.next_checkpoint:
+                    stats.checkpoint(len(beam), len(seen), depth)
+                new_nodes = self._expand_astar_node(current_node, h, stats)
+                if new_nodes is None:
+                    stats.finish(len(beam), len(seen), depth)
+                    return self._build_result(BEAM, current_node, stats)
+                if lap:
+                    lap()
+                for new_node in new_nodes:
+                    if new_node not in seen:
+                        seen.add(new_node)
+                        children.append(new_node)
+                if lap:
+                    lap(DEDUPE)
+            beam = nsmallest(width, children, key=self._beam_rank)
+            # Only what made it into the beam counts as seen, the rest may come back at a later depth
+            for new_node in children:
+                seen.discard(new_node)
+            seen.update(beam)
+            seen_beams.append(beam)
+            if len(seen_beams) > BEAM_SEEN_DEPTHS:
+                seen.difference_update(seen_beams.popleft())
+            stats.nodes_put += len(beam)
+            if lap:
+                lap(QUEUE)
+            depth += 1
+
+        stats.finish(0, len(seen), depth)
+        return self._build_result(BEAM, None, stats)
+
+    @staticmethod
+    def _beam_rank(node):
+        return count_pawns(node.int_position_pawns_caught), node.priority
+
+    def _expand_astar_node(self, current_node, h, stats):
+        """Catches the pawns on current_node's square and scores its children.
+
+        Returns None when that catch was the last pawn, i.e. current_node is the goal.
+        """
+        lap = stats.lap if stats.profile else None
+        if lap:
+            lap()
+        current_position = current_node.path_id
+        new_pawn_state = current_node.int_position_pawns_caught
+
+        # Check if we caught a pawn at this position
+        pawns_caught = self._catch_pawns(current_position, new_pawn_state, current_node.depth)
+        if pawns_caught:
+            stats.caught_pawns += count_pawns(pawns_caught)
+            new_pawn_state ^= pawns_caught
+        if not new_pawn_state:
+            return None
+
+        cur_valid_moves = self.move_table.neighbours[current_position]
+        if lap:
+            lap(MOVE_GENERATION)
+        pawns_alive = self._pawn_ids(new_pawn_state)
+        new_cost = current_node.depth + 1
+
+        if self.batch_heuristics is not None and h.__name__ in self.batch_heuristics.heuristics:
+            estimates = self.batch_heuristics.estimate(h.__name__, current_position, cur_valid_moves,
+                                                       new_pawn_state).tolist()
+        else:
+            if h.__name__ in NO_QUADRANT_HEURISTICS:
+                qpawns, qmoves = None, None
+            elif self.pawn_index is not None and h.__name__ in self.pawn_index.HEURISTICS:
+                qpawns, qmoves = self.pawn_index.quadrantize(current_position, new_pawn_state, cur_valid_moves)
+            else:
+                qpawns, qmoves = self.quadrantize(self.int_to_coord_mappings[current_position],
+                                                  pawns_alive,
+                                                  cur_valid_moves)
+            estimates = [h(path_id, qpawns, qmoves, pawns_alive) for path_id in cur_valid_moves]
+
+        key = current_node.key
+        if key is None:
+            key = self.zobrist.key(current_position, current_node.int_position_pawns_caught)
+        move_key = self.zobrist.move_key(key, current_position, pawns_caught)
+        square_words = self.zobrist.squares
+        children = []
+        for path_id, estimate in zip(cur_valid_moves, estimates):
+            if estimate >= sys.maxint:
+                continue
+            priority = new_cost + estimate
+            if priority > sys.maxint:
+                continue
+            children.append(StateSpaceNodeAStar(current_node, path_id, new_cost,
+                                                new_pawn_state,
+                                                priority, new_cost, move_key ^ square_words[path_id]))
+        stats.nodes_generated += len(children)
+        if lap:
+            lap(HEURISTIC)
+        return children
+
+    def h4(self, path, qpawns, qmoves, pawns_alive):
+        """A lower bound on the moves left, so A* with it finds the shortest plan.
+
+        Every pawn alive has to be reached, which takes at least the knight moves to the farthest one.
+        And after reaching the nearest one, every landing catches at most max_catch pawns.
+        The larger of the two counts.
+        """
+        nearest = sys.maxint
+        farthest = 0
+        for pawn in pawns_alive:
+            pawn_distance = sys.maxint
+            for square in self.pawn_squares[pawn]:
+                knight_distance = self.distance_table.distances_to(square)[path]
+                if knight_distance != UNREACHABLE and knight_distance < pawn_distance:
+                    pawn_distance = knight_distance
+            if pawn_distance == sys.maxint:
+                return sys.maxint
+            nearest = min(nearest, pawn_distance)
+            farthest = max(farthest, pawn_distance)
+        landings = (len(pawns_alive) + self.max_catch - 1) // self.max_catch
+        return max(farthest, nearest + landings - 1)
+
+    def h3(self, path, qpawns, qmoves, pawns_alive):
+        quadrant = qmoves[path]
+        num_pawns_in_quadrant = len(qpawns[quadrant])
+        if num_pawns_in_quadrant == 0:
+            return sys.maxint
+        pawn_in_path = None
+        if path in self.pawn_int_possible_locations_mapping:
+            pawn_in_path = self.pawn_int_possible_locations_mapping[path]
+
+        if pawn_in_path is not None:
+            if pawn_in_path[0] in pawns_alive:
+                return 0
+
+        pawns_in_quadrant = qpawns[quadrant]
+        if 0 < num_pawns_in_quadrant <= 1:
+            conquer_distance = self.get_nearest_distance(pawns_in_quadrant, path)
+        else:
+            conquer_distance = 0
+            d = 1
+            (nx, ny) = self.int_to_coord_mappings[path]
+            seen_pawns = set()
+
+            our_pawn = None
+            while len(seen_pawns) != len(pawns_in_quadrant):
+                least = sys.maxint
+                for p in pawns_in_quadrant:
+                    if p in seen_pawns:
+                        continue
+                    if our_pawn is not None:
+                        (x, y) = self.int_to_coord_mappings[our_pawn]
+                    else:
+                        (x, y) = self.int_to_coord_mappings[p]
+                    euclidean_distance = d * sqrt((x - nx) ** 2 + (y - ny) ** 2)
+                    if euclidean_distance <= least:
+                        our_pawn = p
+                        seen_pawns.add(p)
+                        conquer_distance += euclidean_distance
+                        least = euclidean_distance
+
+        return len(pawns_alive) * self.dim + conquer_distance + self.get_nearest_distance(pawns_in_quadrant, path) \
+            + num_pawns_in_quadrant
+
+    def h2(self, path, qpawns, qmoves, pawns_alive):
+        quadrant = qmoves[path]
+        num_pawns_in_quadrant = len(qpawns[quadrant])
+        if num_pawns_in_quadrant == 0:
+            return sys.maxint
+        pawn_in_path = None
+        if path in self.pawn_int_possible_locations_mapping:
+            pawn_in_path = self.pawn_int_possible_locations_mapping[path]
+
+        if pawn_in_path is not None:
+            if pawn_in_path[0] in pawns_alive:
+                return 0
+        return len(pawns_alive) * self.scale + self.get_nearest_distance(qpawns[quadrant], path)
+
+    def h1(self, path, qpawns, qmoves, pawns_alive):
+        quadrant = qmoves[path]
+        num_pawns_in_quadrant = len(qpawns[quadrant])
+        if num_pawns_in_quadrant == 0:
+            return sys.maxint
+        pawn_in_path = None
+        if path in self.pawn_int_possible_locations_mapping:
+            pawn_in_path = self.pawn_int_possible_locations_mapping[path]
+
+        if pawn_in_path is not None:
+            if pawn_in_path[0] in pawns_alive:
+                return 0
+        least_distance = self.get_nearest_distance(qpawns[quadrant], path)
+        return len(pawns_alive) * self.scale + least_distance + num_pawns_in_quadrant
+
+    def get_nearest_distance(self, pawns, path):
+        if self.knight_distance:
+            return self.get_nearest_knight_distance(pawns, path)
+        if isinstance(pawns, PawnSet):
+            return pawns.nearest_distance(path)
+        least_distance = sys.maxint
+        (nx, ny) = self.int_to_coord_mappings[path]
+        d = 1
+        for i in pawns:
+            (x, y) = self.int_to_coord_mappings[i]
+            euclidean_distance = d * sqrt((x - nx) ** 2 + (y - ny) ** 2)
+            if euclidean_distance < least_distance:
+                least_distance = euclidean_distance
+        return least_distance
+
+    def get_nearest_knight_distance(self, pawns, path):
+        mask = None
+        if isinstance(pawns, PawnSet):
+            mask = pawns.mask
+        elif self.pawn_index is not None and isinstance(pawns, frozenset):
+            mask = self._pawns_to_mask.get(pawns)
+        if mask is not None:
+            least_distance = self.pawn_index.nearest_knight_distance(path, mask)
+            return sys.maxint if least_distance is None else least_distance
+        least_distance = sys.maxint
+        for pawn in pawns:
+            for square in self.pawn_squares[pawn]:
+                knight_distance = self.distance_table.distances_to(square)[path]
+                if knight_distance != UNREACHABLE and knight_distance < least_distance:
+                    least_distance = knight_distance
+        return least_distance
+
+    def quadrantize(self, (px, py), pawn_on_board, cur_valid_moves):
+        quadrant_pawns = {1: [], 2: [], 3: [], 4: []}
+        quadrant_moves = dict()
+        for i in pawn_on_board:
+            (x, y) = self.int_to_coord_mappings[i]
+            if x >= px and y >= py:
+                quadrant_pawns[1].append(i)
+            elif x <= px and y >= py:
+                quadrant_pawns[2].append(i)
+            elif x <= px and y <= py:
+                quadrant_pawns[3].append(i)
+            else:
+                quadrant_pawns[4].append(i)
+        for i in cur_valid_moves:
+            (x, y) = self.int_to_coord_mappings[i]
+            if x >= px and y >= py:
+                quadrant_moves[i] = 1
+            elif x <= px and y >= py:
+                quadrant_moves[i] = 2
+            elif x <= px and y <= py:
+                quadrant_moves[i] = 3
+            else:
+                quadrant_moves[i] = 4
+        return quadrant_pawns, quadrant_moves
+
+
+def solve(dim, knight, pawns, algorithm=ASTAR, **options):
+    """Shortcut for Solver(dim, knight, pawns).solve(algorithm, **options)"""
+    return Solver(dim, knight, pawns).solve(algorithm, **options)
@@ -0,0 +1,167 @@
+"""Spatial index over the pawns of a puzzle, for the nearest pawn and pawns per quadrant questions
+the heuristics ask on every expansion.
+
+Everything works on pawn bitmasks (bit i is pawns_on_the_board[i], as in Solver(bitmask=True)),
+so one index serves every pawn state of the search:
+
+ - the pawns in each quadrant around every square are precomputed as masks, counting the ones
+   alive is one AND and a popcount
+ - the board is cut in square buckets, and the pawns in every ring of buckets around a bucket are
+   one mask too. The nearest pawn is looked for ring by ring, stopping once a ring can hold
+   nothing closer than what was found.
+"""
+from math import sqrt
+
+from knight import UNREACHABLE
+
+BUCKET_SIZE = 4
+
+
+def count_bits(mask):
+    return bin(mask).count('1')
+
+
+class PawnSet(object):
+    """The pawns of one quadrant, what Solver.quadrantize puts in a bucket list"""
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = mask
+        self.size = count_bits(mask)
+
+    def __len__(self):
+        return self.size
+
+    def nearest_distance(self, square):
+        return self.index.nearest_distance(square, self.mask)
+
+    def nearest_knight_distance(self, square):
+        return self.index.nearest_knight_distance(square, self.mask)
+
+
+class PawnIndex(object):
+    """@param solver: the solver.Solver (in bitmask mode) whose pawns to index"""
+
+    # The heuristics that can use the index: h3 walks the pawns of a quadrant in the order
+    # quadrantize lists them, which masks don't keep, and h4 reads no quadrants at all
+    HEURISTICS = frozenset(['h1', 'h2'])
+
+    def __init__(self, solver, bucket_size=BUCKET_SIZE):
+        self.solver = solver
+        self.dim = dim = solver.dim
+        self.bucket_size = bucket_size
+        self.pawn_coords = [solver.int_to_coord_mappings[pawn] for pawn in solver.pawns_on_the_board]
+        # The squares of every pawn, the knight distance heuristics go for the nearer one
+        self.pawn_squares = [solver.pawn_squares[pawn] for pawn in solver.pawns_on_the_board]
+
+        # at[x][y], the pawns starting on (x, y)
+        at = [[0] * dim for x in range(dim)]
+        for bit, (x, y) in enumerate(self.pawn_coords):
+            at[x][y] |= 1 << bit
+        # Pawns with x >= / <= and y >= / <= a square, plus the empty mask for a row or column off the board
+        up_right = _corner_masks(at, dim, range(dim - 1, -1, -1), range(dim - 1, -1, -1), 1, 1)
+        up_left = _corner_masks(at, dim, range(dim), range(dim - 1, -1, -1), -1, 1)
+        down_left = _corner_masks(at, dim, range(dim), range(dim), -1, -1)
+        down_right = _corner_masks(at, dim, range(dim - 1, -1, -1), range(dim), 1, -1)
+
+        # The quadrants of Solver.quadrantize: 1 is x >= px and y >= py, 2 is x < px and y >= py,
+        # 3 is x <= px and y < py, 4 is x > px and y < py
+        self.quadrant_masks = [None] * solver.move_table.size
+        for square, (px, py) in solver.int_to_coord_mappings.items():
+            self.quadrant_masks[square] = (up_right[px][py],
+                                           up_left[px - 1][py],
+                                           down_left[px][py - 1],
+                                           down_right[px + 1][py - 1])
+
+        self.buckets = (dim + bucket_size - 1) // bucket_size
+        self.start_rings = self._ring_masks(dict((bit, [coords]) for bit, coords in enumerate(self.pawn_coords)))
+        self.square_rings = self._ring_masks(dict(
+            (bit, [solver.int_to_coord_mappings[square] for square in squares])
+            for bit, squares in enumerate(self.pawn_squares)))
+
+    def _ring_masks(self, pawn_coords):
+        """rings[bx][by][r], the pawns with a square in a bucket r buckets away from bucket (bx, by)"""
+        buckets = self.buckets
+        bucket_masks = [[0] * buckets for i in range(buckets)]
+        for bit, coords in pawn_coords.items():
+            for (x, y) in coords:
+                bucket_masks[x // self.bucket_size][y // self.bucket_size] |= 1 << bit
+        rings = [[None] * buckets for i in range(buckets)]
+        for bx in range(buckets):
+            for by in range(buckets):
+                ring_masks = [0] * buckets
+                for ox in range(buckets):
+                    for oy in range(buckets):
+                        ring_masks[max(abs(ox - bx), abs(oy - by))] |= bucket_masks[ox][oy]
+                rings[bx][by] = ring_masks
+        return rings
+
+    def quadrantize(self, position, pawns_alive, cur_valid_moves):
+        """Solver.quadrantize, with a PawnSet per quadrant instead of a list of pawns"""
+        quadrant_masks = self.quadrant_masks[position]
+        quadrant_pawns = {1: PawnSet(self, quadrant_masks[0] & pawns_alive),
+                          2: PawnSet(self, quadrant_masks[1] & pawns_alive),
+                          3: PawnSet(self, quadrant_masks[2] & pawns_alive),
+                          4: PawnSet(self, quadrant_masks[3] & pawns_alive)}
+        (px, py) = self.solver.int_to_coord_mappings[position]
+        quadrant_moves = dict()
+        for i in cur_valid_moves:
+            (x, y) = self.solver.int_to_coord_mappings[i]
+            if y >= py:
+                quadrant_moves[i] = 1 if x >= px else 2
+            else:
+                quadrant_moves[i] = 3 if x <= px else 4
+        return quadrant_pawns, quadrant_moves
+
+    def nearest_distance(self, square, pawns):
+        """Straight line distance from square to the nearest pawn in the pawns mask, like
+        Solver.get_nearest_distance"""
+        (nx, ny) = self.solver.int_to_coord_mappings[square]
+        rings = self.start_rings[nx // self.bucket_size][ny // self.bucket_size]
+        least_distance = float('inf')
+        for ring, ring_mask in enumerate(rings):
+            # Every square ring buckets away is at least this far along one axis
+            if ring and least_distance <= (ring - 1) * self.bucket_size + 1:
+                break
+            candidates = ring_mask & pawns
+            while candidates:
+                low = candidates & -candidates
+                candidates ^= low
+                (x, y) = self.pawn_coords[low.bit_length() - 1]
+                distance = sqrt((x - nx) ** 2 + (y - ny) ** 2)
+                if distance < least_distance:
+                    least_distance = distance
+        return least_distance
+
+    def nearest_knight_distance(self, square, pawns):
+        """Knight moves from square to the nearest square of a pawn in the pawns mask, None if none is reachable"""
+        (nx, ny) = self.solver.int_to_coord_mappings[square]
+        rings = self.square_rings[nx // self.bucket_size][ny // self.bucket_size]
+        distance_table = self.solver.distance_table
+        least_distance = None
+        for ring, ring_mask in enumerate(rings):
+            # A knight move gets at most 2 squares closer along either axis
+            if ring and least_distance is not None and \
+                    least_distance <= ((ring - 1) * self.bucket_size + 2) // 2:
+                break
+            candidates = ring_mask & pawns
+            while candidates:
+                low = candidates & -candidates
+                candidates ^= low
+                for pawn_square in self.pawn_squares[low.bit_length() - 1]:
+                    distance = distance_table.distances_to(pawn_square)[square]
+                    if distance != UNREACHABLE and (least_distance is None or distance < least_distance):
+                        least_distance = distance
+        return least_distance
+
+
+def _corner_masks(at, dim, xs, ys, step_x, step_y):
+    """masks[x][y], the pawns from (x, y) on towards the corner step_x, step_y points at.
+
+    Index -1 and dim hold the empty mask, for the quadrants that run off the board.
+    """
+    masks = [[0] * (dim + 1) for x in range(dim + 1)]
+    for x in xs:
+        for y in ys:
+            masks[x][y] = at[x][y] | masks[x + step_x][y] | masks[x][y + step_y]
+    return masks
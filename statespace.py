@@ -1,30 +1,55 @@
+def pawn_state_key(pawns):
+    """Pawn bitmasks hash as they are, pawn sets as a frozenset, whatever order they list their pawns in"""
+    if isinstance(pawns, (int, long, frozenset)):
+        return pawns
+    return frozenset(pawns)
+
+
 class StateSpaceNode(object):
-    def __init__(self, parent, path, depth, pawns={}):
+    # Searches make millions of nodes, slots keep each one small
+    __slots__ = ('parent', 'int_position_pawns_caught', 'path_id', 'depth', 'key', 'hash')
+
+    def __init__(self, parent, path, depth, pawns={}, key=None):
+        """
+        @param key: the Zobrist key of the state (see zobrist.py), hashed from scratch if None
+        """
         self.parent = parent
         self.int_position_pawns_caught = pawns
         self.path_id = path
         self.depth = depth
-        self.hash = hash((self.path_id, self.depth, tuple(self.int_position_pawns_caught)))
+        self.key = key
+        self.hash = self._state_hash() if key is None else self._key_hash(key)
+
+    def _state_hash(self):
+        return hash((self.path_id, pawn_state_key(self.int_position_pawns_caught)))
+
+    def _key_hash(self, key):
+        return key
 
     def __hash__(self):
         return self.hash
 
     def __eq__(self, other):
-        has_value = True
-        # for p in self.int_position_pawns_caught:
-        #     if p not in other.int_position_pawns_caught:
-        #         has_value = False
+        # Pawns are caught the same whatever the move the knight lands with (see Solver.capture_masks),
+        # so the depth is no part of a state. Only the start is a state of its own: the knight catches
+        # nothing there, but does coming back to it.
         return self.path_id == other.path_id and \
-               len(self.int_position_pawns_caught - other.int_position_pawns_caught) == 0 and len(
-                   other.int_position_pawns_caught - self.int_position_pawns_caught) == 0 \
-               and self.depth == other.depth
+               self.int_position_pawns_caught == other.int_position_pawns_caught \
+               and (not self.depth) == (not other.depth)
 
 
 class StateSpaceNodeDFS(StateSpaceNode):
-    def __init__(self, parent, path, depth, pawns={}, last_move=None):
-        super(StateSpaceNodeDFS, self).__init__(parent, path, depth, pawns)
+    __slots__ = ('last_move',)
+
+    def __init__(self, parent, path, depth, pawns={}, last_move=None, key=None):
         self.last_move = last_move
-        self.hash = hash((self.path_id, tuple(self.int_position_pawns_caught), self.last_move))
+        super(StateSpaceNodeDFS, self).__init__(parent, path, depth, pawns, key)
+
+    def _state_hash(self):
+        return hash((self.path_id, pawn_state_key(self.int_position_pawns_caught), self.last_move))
+
+    def _key_hash(self, key):
+        return hash((key, self.last_move))
 
     def __hash__(self):
         return self.hash
@@ -35,16 +60,16 @@ class StateSpaceNodeDFS(StateSpaceNode):
         #     if p not in other.int_position_pawns_caught:
         #         has_value = False
         return self.path_id == other.path_id and \
-               len(self.int_position_pawns_caught - other.int_position_pawns_caught) == 0 and len(
-                   other.int_position_pawns_caught - self.int_position_pawns_caught) == 0 \
+               self.int_position_pawns_caught == other.int_position_pawns_caught \
                and self.last_move == other.last_move
 
 
 class StateSpaceNodeAStar(StateSpaceNode):
-    def __init__(self, parent, path, depth, pawns={}, priority=0, cost=0):
-        super(StateSpaceNodeAStar, self).__init__(parent, path, depth, pawns)
+    __slots__ = ('priority', 'cost')
+
+    def __init__(self, parent, path, depth, pawns={}, priority=0, cost=0, key=None):
+        super(StateSpaceNodeAStar, self).__init__(parent, path, depth, pawns, key)
         self.priority = priority
-        self.hash = hash((self.path_id, tuple(self.int_position_pawns_caught)))
         self.cost = cost
 
     def __cmp__(self, other):
@@ -55,14 +80,3 @@ class StateSpaceNodeAStar(StateSpaceNode):
 
     def __hash__(self):
         return self.hash
-
-    def __eq__(self, other):
-        has_value = True
-        # for p in self.int_position_pawns_caught:
-        #     if p not in other.int_position_pawns_caught:
-        #         has_value = False
-        return self.path_id == other.path_id and \
-               len(self.int_position_pawns_caught - other.int_position_pawns_caught) == 0 and len(
-                   other.int_position_pawns_caught - self.int_position_pawns_caught) == 0 \
-               #and self.depth == other.depth
-               #and self.priority == other.priority and self.depth == other.depth
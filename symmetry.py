@@ -0,0 +1,97 @@
+"""The 8 rotations and reflections of the board, used to give mirrored puzzles one canonical form.
+
+A transform maps a puzzle to an equivalent one: the knight moves are the same (see symmetries),
+every pawn still oscillates between the images of its two squares, so a solution of one is a
+solution of the other once its moves are mapped through the inverse transform.
+"""
+from knight import compute_valid_moves
+from pawn import UP, DOWN, LEFT, RIGHT
+
+IDENTITY = 'identity'
+ROTATE_90 = 'rotate_90'
+ROTATE_180 = 'rotate_180'
+ROTATE_270 = 'rotate_270'
+FLIP_X = 'flip_x'
+FLIP_Y = 'flip_y'
+TRANSPOSE = 'transpose'
+ANTI_TRANSPOSE = 'anti_transpose'
+
+# (x, y) -> (x, y) on a board whose last row and column are n
+_TRANSFORMS = {
+    IDENTITY: lambda x, y, n: (x, y),
+    ROTATE_90: lambda x, y, n: (n - y, x),
+    ROTATE_180: lambda x, y, n: (n - x, n - y),
+    ROTATE_270: lambda x, y, n: (y, n - x),
+    FLIP_X: lambda x, y, n: (n - x, y),
+    FLIP_Y: lambda x, y, n: (x, n - y),
+    TRANSPOSE: lambda x, y, n: (y, x),
+    ANTI_TRANSPOSE: lambda x, y, n: (n - y, n - x),
+}
+TRANSFORMS = (IDENTITY, ROTATE_90, ROTATE_180, ROTATE_270, FLIP_X, FLIP_Y, TRANSPOSE, ANTI_TRANSPOSE)
+INVERSES = {IDENTITY: IDENTITY, ROTATE_90: ROTATE_270, ROTATE_180: ROTATE_180, ROTATE_270: ROTATE_90,
+            FLIP_X: FLIP_X, FLIP_Y: FLIP_Y, TRANSPOSE: TRANSPOSE, ANTI_TRANSPOSE: ANTI_TRANSPOSE}
+
+# The square a pawn moves to from its starting square, see Pawn.get_tuple_possible_moves.
+# Direction 0 and anything else unknown moves like RIGHT.
+DIRECTION_STEPS = {UP: (0, 1), DOWN: (0, -1), LEFT: (-1, 0), RIGHT: (1, 0)}
+STEP_DIRECTIONS = dict((step, direction) for direction, step in DIRECTION_STEPS.items())
+
+_symmetries = dict()
+
+
+def transform_square(transform, dim, (x, y)):
+    return _TRANSFORMS[transform](x, y, dim - 1)
+
+
+def transform_pawn(transform, dim, (x, y, direction)):
+    """Maps a pawn (x, y, direction) so it oscillates between the images of its squares"""
+    dx, dy = DIRECTION_STEPS.get(direction, DIRECTION_STEPS[RIGHT])
+    sx, sy = transform_square(transform, dim, (x, y))
+    ex, ey = transform_square(transform, dim, (x + dx, y + dy))
+    return sx, sy, STEP_DIRECTIONS[(ex - sx, ey - sy)]
+
+
+def transform_puzzle(transform, dim, knight, pawns):
+    """Returns the knight square and the pawns of the puzzle seen through transform"""
+    return (transform_square(transform, dim, knight),
+            [transform_pawn(transform, dim, pawn) for pawn in pawns])
+
+
+def transform_moves(transform, dim, moves):
+    return [transform_square(transform, dim, move) for move in moves]
+
+
+def symmetries(dim):
+    """The transforms that leave the knight moves of a dim x dim board unchanged.
+
+    The move rules in knight.py are not written symmetrically, so rather than trust them
+    every transform is checked against the moves once per board size.
+    """
+    found = _symmetries.get(dim)
+    if found is None:
+        moves = set()
+        for x in range(dim):
+            for y in range(dim):
+                for target in compute_valid_moves(x, y, dim):
+                    moves.add(((x, y), target))
+        found = tuple(transform for transform in TRANSFORMS
+                      if all((transform_square(transform, dim, source), transform_square(transform, dim, target))
+                             in moves for (source, target) in moves))
+        _symmetries[dim] = found
+    return found
+
+
+def canonicalize(dim, knight, pawns):
+    """Picks the representative of the puzzle among its symmetric images.
+
+    Returns (transform, knight, pawns) with the transform that maps the given puzzle onto the
+    representative. Map the representative's solution back with transform_moves(INVERSES[transform], ...).
+    """
+    best = None
+    for transform in symmetries(dim):
+        knight_image, pawn_images = transform_puzzle(transform, dim, knight, pawns)
+        encoding = (tuple(knight_image), sorted(pawn_images))
+        if best is None or encoding < best[0]:
+            best = (encoding, transform, knight_image, pawn_images)
+    encoding, transform, knight_image, pawn_images = best
+    return transform, knight_image, sorted(pawn_images)
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cache
+import solver
+import symmetry
+from test_solver import replay, seeded_puzzle
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = cache.SolutionCache(os.path.join(self.directory, 'solutions.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_second_solve_is_a_cache_hit(self):
+        puzzle = seeded_puzzle(10, 3, 7)
+        first = solver.Solver(*puzzle).solve(solver.ASTAR, cache=self.cache)
+        second = solver.Solver(*puzzle).solve(solver.ASTAR, cache=self.cache)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.moves, first.moves)
+
+    def test_pawn_order_does_not_change_the_key(self):
+        dim, knight, pawns = seeded_puzzle(10, 3, 7)
+        self.assertEqual(cache.puzzle_key(dim, knight, pawns, solver.ASTAR),
+                         cache.puzzle_key(dim, knight, list(reversed(pawns)), solver.ASTAR))
+
+    def test_options_and_solver_settings_are_part_of_the_key(self):
+        puzzle = seeded_puzzle(14, 5, 0)
+        solver.Solver(*puzzle).solve(solver.ASTAR, cache=self.cache)
+        self.assertFalse(solver.Solver(*puzzle).solve(solver.ASTAR, heuristic='h4', cache=self.cache).cached)
+        result = solver.Solver(*puzzle, knight_distance=True).solve(solver.ASTAR, cache=self.cache)
+        self.assertFalse(result.cached)
+        self.assertEqual(result.moves, solver.Solver(*puzzle, knight_distance=True).solve(solver.ASTAR).moves)
+
+    def test_least_recently_used_entries_go_first(self):
+        small_cache = cache.SolutionCache(os.path.join(self.directory, 'small.sqlite'), max_entries=2)
+        for key in ('a', 'b'):
+            small_cache.put(key, True, [(1, 2)])
+        small_cache.get('a')
+        small_cache.put('c', False, [])
+        self.assertEqual(len(small_cache), 2)
+        self.assertIsNone(small_cache.get('b'))
+        self.assertEqual(small_cache.get('a'), (True, [(1, 2)]))
+        small_cache.close()
+
+
+class SymmetryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = cache.SolutionCache(os.path.join(self.directory, 'solutions.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_mirrored_boards_are_cache_hits(self):
+        dim, knight, pawns = seeded_puzzle(10, 3, 7)
+        first = solver.Solver(dim, knight, pawns).solve(solver.ASTAR, cache=self.cache)
+        self.assertTrue(len(symmetry.symmetries(dim)) > 1)
+        for transform in symmetry.symmetries(dim):
+            image_knight, image_pawns = symmetry.transform_puzzle(transform, dim, knight, pawns)
+            result = solver.Solver(dim, image_knight, image_pawns).solve(solver.ASTAR, cache=self.cache)
+            self.assertTrue(result.cached, transform)
+            self.assertEqual(len(result), len(first), transform)
+            self.assertEqual(replay(dim, image_knight, image_pawns, result.moves), [], transform)
+
+    def test_transforms_keep_the_knight_moves(self):
+        for dim in (8, 11):
+            for transform in symmetry.symmetries(dim):
+                inverse = symmetry.INVERSES[transform]
+                for square in [(1, 2), (3, 5), (dim - 2, 1)]:
+                    image = symmetry.transform_square(transform, dim, square)
+                    self.assertEqual(symmetry.transform_square(inverse, dim, image), square)
+
+    def test_canonical_form_is_shared(self):
+        dim, knight, pawns = seeded_puzzle(12, 4, 3)
+        canonical = symmetry.canonicalize(dim, knight, pawns)[1:]
+        for transform in symmetry.symmetries(dim):
+            image_knight, image_pawns = symmetry.transform_puzzle(transform, dim, knight, pawns)
+            self.assertEqual(symmetry.canonicalize(dim, image_knight, image_pawns)[1:], canonical, transform)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+    import externalbfs
+except ImportError:
+    numpy = None
+
+import solver
+from test_solver import replay, seeded_puzzle, shortest_length
+
+
+@unittest.skipIf(numpy is None, "needs numpy")
+class ExternalBfsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def search(self, puzzle, chunk_states=None):
+        """(path, stats) of external_bfs on puzzle, with its files in self.directory"""
+        stats = solver.SearchStats()
+        path = externalbfs.external_bfs(solver.Solver(*puzzle), stats, self.directory,
+                                        chunk_states or externalbfs.CHUNK_STATES)
+        return path, stats
+
+    def test_plans_are_as_short_as_bfs(self):
+        for seed in range(4):
+            puzzle = seeded_puzzle(10, 4, seed)
+            result = solver.Solver(*puzzle).solve(solver.EXTERNAL_BFS)
+            self.assertEqual(len(result), shortest_length(puzzle), seed)
+            self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [], seed)
+
+    def test_small_chunks_give_the_same_search(self):
+        merge_block = externalbfs.MIN_MERGE_BLOCK
+        externalbfs.MIN_MERGE_BLOCK = 2
+        try:
+            for seed in range(3):
+                puzzle = seeded_puzzle(12, 4, seed)
+                path, stats = self.search(puzzle)
+                chunked_path, chunked_stats = self.search(puzzle, chunk_states=5)
+                self.assertEqual(len(chunked_path), len(path), seed)
+                self.assertEqual(chunked_stats.nodes_opened, stats.nodes_opened, seed)
+                self.assertEqual(chunked_stats.nodes_put, stats.nodes_put, seed)
+        finally:
+            externalbfs.MIN_MERGE_BLOCK = merge_block
+
+    def test_every_state_is_opened_once(self):
+        # With no goal to stop at, it goes through the states the packed BFS does, each of them once.
+        # The packed BFS does not flag the start, it opens it again when the knight comes back.
+        puzzle = (12, (5, 5), [(0, 4, 1), (6, 7, 1)])
+        path, stats = self.search(puzzle, chunk_states=7)
+        packed = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+        self.assertIsNone(path)
+        self.assertEqual(stats.nodes_opened, packed.stats.nodes_opened - 1)
+
+    def test_files_are_removed(self):
+        self.search(seeded_puzzle(10, 4, 0))
+        self.search((8, (3, 3), [(0, 2, 1), (4, 5, 1)]))
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import solver
+from knight import get_move_table
+from test_solver import replay, seeded_puzzle, shortest_length
+
+
+def one_way_moves(dim):
+    """The (from, to) square ids of the knight moves on a dim x dim board with no move back"""
+    neighbours = get_move_table(dim).neighbours
+    return [(square, target) for square in range(len(neighbours)) for target in neighbours[square]
+            if square not in neighbours[target]]
+
+
+def reachable(dim, square):
+    """The square ids the knight can get to from square, square included"""
+    neighbours = get_move_table(dim).neighbours
+    seen = {square}
+    stack = [square]
+    while stack:
+        for target in neighbours[stack.pop()]:
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return seen
+
+
+def unreachable_pawn_puzzle(dim, seed):
+    """A seeded board plus a pawn on the grey border, where the knight never goes"""
+    dim, knight, pawns = seeded_puzzle(dim, 2, seed)
+    return dim, knight, pawns + [(0, 3, 1)]
+
+
+class OneWayMoveTest(unittest.TestCase):
+    def test_some_moves_cannot_be_undone(self):
+        self.assertEqual(len(one_way_moves(8)), 88)
+        self.assertEqual(len(one_way_moves(22)), 312)
+
+    def test_one_way_moves_are_on_no_cycle(self):
+        for dim in (8, 12, 22):
+            for square, target in one_way_moves(dim):
+                self.assertNotIn(square, reachable(dim, target), (dim, square, target))
+
+
+class FrontierBfsTest(unittest.TestCase):
+    def test_plans_are_as_short_as_bfs(self):
+        for dim in (8, 12):
+            for seed in range(3):
+                puzzle = seeded_puzzle(dim, 4, seed)
+                result = solver.Solver(*puzzle).solve(solver.FRONTIER_BFS)
+                self.assertEqual(len(result), shortest_length(puzzle), (dim, seed))
+                self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [], (dim, seed))
+
+    def test_re_expansion_is_bounded(self):
+        # With no goal both go through every state there is, the packed BFS opening each one once
+        re_expanded = False
+        for dim in (8, 12, 16):
+            for seed in range(4):
+                puzzle = unreachable_pawn_puzzle(dim, seed)
+                frontier = solver.Solver(*puzzle).solve(solver.FRONTIER_BFS)
+                packed = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+                self.assertFalse(frontier.is_solved(), (dim, seed))
+                self.assertTrue(frontier.stats.nodes_opened <= 2 * packed.stats.nodes_opened,
+                                (dim, seed, frontier.stats.nodes_opened, packed.stats.nodes_opened))
+                re_expanded = re_expanded or frontier.stats.nodes_opened > packed.stats.nodes_opened
+        self.assertTrue(re_expanded)
+
+    def test_keeps_three_depths_at_most(self):
+        puzzle = unreachable_pawn_puzzle(16, 1)
+        frontier = solver.Solver(*puzzle).solve(solver.FRONTIER_BFS)
+        packed = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+        self.assertTrue(frontier.stats.peak_closed + frontier.stats.peak_frontier < packed.stats.closed_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import solver
+from test_solver import replay, seeded_puzzle, shortest_length
+
+
+@unittest.skipIf(numpy is None, "needs numpy")
+class LayeredBfsTest(unittest.TestCase):
+    def test_plans_are_as_short_as_bfs(self):
+        for seed in range(4):
+            puzzle = seeded_puzzle(10, 4, seed)
+            result = solver.Solver(*puzzle).solve(solver.LAYERED_BFS)
+            self.assertEqual(len(result), shortest_length(puzzle), seed)
+            self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [], seed)
+
+    def test_opens_the_states_packed_bfs_does(self):
+        # With no goal to stop at, both go through every state the knight can reach
+        puzzle = (8, (3, 3), [(0, 2, 1), (4, 5, 1)])
+        layered = solver.Solver(*puzzle).solve(solver.LAYERED_BFS)
+        packed = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+        self.assertFalse(layered.is_solved())
+        self.assertEqual(layered.stats.nodes_opened, packed.stats.nodes_opened)
+
+    def test_callback_keeps_up_with_whole_depths(self):
+        checkpoints = []
+        stats = solver.SearchStats(callback=lambda stats: checkpoints.append(stats.nodes_opened),
+                                   callback_interval=50)
+        solver.Solver(*seeded_puzzle(10, 4, 2)).solve(solver.LAYERED_BFS, stats=stats)
+        self.assertTrue(checkpoints)
+        self.assertTrue(stats.next_checkpoint > stats.nodes_opened)
+
+    def test_too_many_pawns_for_64_bits(self):
+        with self.assertRaises(ValueError):
+            solver.Solver(*seeded_puzzle(14, 64, 0)).solve(solver.LAYERED_BFS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import packedbfs
+import solver
+from test_solver import replay, seeded_puzzle, shortest_length
+
+
+class PackedBfsTest(unittest.TestCase):
+    def test_plans_are_as_short_as_bfs(self):
+        for seed in range(4):
+            puzzle = seeded_puzzle(10, 4, seed)
+            result = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+            self.assertEqual(len(result), shortest_length(puzzle), seed)
+            self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [], seed)
+
+    def test_seen_set_past_the_flag_limit(self):
+        puzzle = seeded_puzzle(10, 4, 1)
+        flagged = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+        max_bytes = packedbfs.SEEN_FLAGS_MAX_BYTES
+        packedbfs.SEEN_FLAGS_MAX_BYTES = 0
+        try:
+            self.assertIsNone(packedbfs.seen_flags(solver.Solver(*puzzle)))
+            result = solver.Solver(*puzzle).solve(solver.PACKED_BFS)
+        finally:
+            packedbfs.SEEN_FLAGS_MAX_BYTES = max_bytes
+        self.assertEqual(result.moves, flagged.moves)
+        self.assertEqual(result.stats.nodes_opened, flagged.stats.nodes_opened)
+
+    def test_states_pack_and_unpack(self):
+        packed_solver = solver.Solver(*seeded_puzzle(10, 4, 0))
+        store = packedbfs.PackedStates(packed_solver)
+        state = store.pack(packed_solver.knight_id, packed_solver.root_pawns)
+        self.assertEqual(store.unpack(state), (packed_solver.knight_id, packed_solver.root_pawns))
+
+    def test_wide_states_go_in_a_list(self):
+        wide_solver = solver.Solver(*seeded_puzzle(14, packedbfs.STATE_BITS, 0))
+        store = packedbfs.PackedStates(wide_solver)
+        self.assertIsInstance(store.states, list)
+        self.assertIsNone(packedbfs.seen_flags(wide_solver))
+        state = store.pack(wide_solver.knight_id, wide_solver.root_pawns)
+        self.assertEqual(store.unpack(state), (wide_solver.knight_id, wide_solver.root_pawns))
+
+    def test_needs_bitmasks(self):
+        with self.assertRaises(ValueError):
+            solver.Solver(*seeded_puzzle(10, 4, 0), bitmask=False).solve(solver.PACKED_BFS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import unittest
+
+import parallel
+import solver
+from test_solver import replay, seeded_puzzle
+
+
+class CrashingSolver(solver.Solver):
+    """A solver whose heuristics break down inside the worker processes"""
+
+    def h_raises(self, path, qpawns, qmoves, pawns_alive):
+        raise ValueError("no estimate for square %d" % path)
+
+    def h_exits(self, path, qpawns, qmoves, pawns_alive):
+        os._exit(3)
+
+
+class HdaStarTest(unittest.TestCase):
+    def test_plans_do_not_depend_on_the_processes(self):
+        for seed in range(2):
+            puzzle = seeded_puzzle(12, 4, seed)
+            length = len(solver.Solver(*puzzle).solve(solver.ASTAR, heuristic='h4'))
+            for processes in (1, 2, 3):
+                result = solver.Solver(*puzzle).solve(solver.HDASTAR, heuristic='h4', processes=processes)
+                self.assertEqual(len(result), length, (seed, processes))
+                self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [])
+
+    def test_worker_exception_reaches_the_parent(self):
+        crashing_solver = CrashingSolver(*seeded_puzzle(10, 3, 0))
+        with self.assertRaises(parallel.WorkerFailed) as raised:
+            crashing_solver.solve(solver.HDASTAR, heuristic='h_raises', processes=2)
+        self.assertIn("no estimate for square", str(raised.exception))
+
+    def test_dead_worker_ends_the_search(self):
+        crashing_solver = CrashingSolver(*seeded_puzzle(10, 3, 0))
+        with self.assertRaises(parallel.WorkerFailed) as raised:
+            crashing_solver.solve(solver.HDASTAR, heuristic='h_exits', processes=2)
+        self.assertIn("exited with code 3", str(raised.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""Checks the plans of every search in solver.py against the rules of the game.
+
+The test modules of the other search modules share the helpers here.
+
+    python -m unittest discover
+"""
+import random
+import sys
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import solver
+from knight import Knight
+from pawn import LEFT, RIGHT, Pawn
+
+NUMPY_ALGORITHMS = (solver.LAYERED_BFS,)
+
+
+def seeded_puzzle(dim, number_of_pawns, seed):
+    """(dim, knight, pawns) of the board generate_starting_locations makes with that seed"""
+    knight, pawns = solver.generate_starting_locations(dim, number_of_pawns, random.Random(seed))
+    return dim, knight.get_position(), sorted(solver.describe_pawns(pawns.values()))
+
+
+def shortest_length(puzzle):
+    """Moves of the shortest plan for puzzle, from BFS"""
+    return len(solver.Solver(*puzzle).solve(solver.BFS))
+
+
+def options_for(algorithm):
+    options = dict()
+    if algorithm in (solver.ASTAR, solver.IDASTAR, solver.HDASTAR, solver.ANYTIME):
+        options['heuristic'] = 'h4'
+    if algorithm == solver.HDASTAR:
+        options['processes'] = 2
+    return options
+
+
+def algorithms():
+    if numpy is None:
+        return [algorithm for algorithm in solver.ALGORITHMS if algorithm not in NUMPY_ALGORITHMS]
+    return list(solver.ALGORITHMS)
+
+
+def replay(dim, knight, pawns, moves):
+    """Plays moves the way GameBoard does, returns the pawns left on the board.
+
+    @raise AssertionError: for a move the knight is not allowed to make
+    """
+    knight = Knight(knight[0], knight[1], dim)
+    return play(dim, knight, [Pawn(x, y, dim, direction) for (x, y, direction) in pawns], moves)
+
+
+def play(dim, knight, pawns_left, moves):
+    """replay for the Knight and Pawn objects of a game under way, which it moves along"""
+    for move in moves:
+        if move not in knight.get_valid_moves():
+            raise AssertionError("The knight on %s cannot jump to %s" % (knight.get_position(), move))
+        knight.set_position(*move)
+        # The knight takes the pawns it lands on, then the pawns move and walk into it
+        pawns_left = [pawn for pawn in pawns_left if pawn.get_position() != move]
+        for pawn in pawns_left:
+            pawn.move(dim)
+        pawns_left = [pawn for pawn in pawns_left if pawn.get_position() != move]
+    return pawns_left
+
+
+class PlanTest(unittest.TestCase):
+    PUZZLES = [seeded_puzzle(8, 2, 1), seeded_puzzle(10, 3, 2), seeded_puzzle(10, 4, 3)]
+
+    def test_plans_catch_every_pawn(self):
+        for puzzle in self.PUZZLES:
+            for algorithm in algorithms():
+                result = solver.Solver(*puzzle).solve(algorithm, **options_for(algorithm))
+                self.assertTrue(result.is_solved(), (puzzle, algorithm))
+                self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], result.moves), [], (puzzle, algorithm))
+
+
+class EdgeCaseTest(unittest.TestCase):
+    def test_no_pawns_is_solved_without_a_move(self):
+        for algorithm in algorithms():
+            result = solver.Solver(8, (3, 3), []).solve(algorithm, **options_for(algorithm))
+            self.assertTrue(result.is_solved(), algorithm)
+            self.assertEqual(result.moves, [], algorithm)
+
+    def test_unreachable_pawn_is_not_solved(self):
+        # The knight never gets onto the border, where the first pawn walks
+        puzzle = (8, (3, 3), [(0, 2, 1), (4, 5, 1)])
+        for algorithm in algorithms():
+            for heuristic in ('h1', 'h4'):
+                options = options_for(algorithm)
+                if 'heuristic' in options or algorithm == solver.BEAM:
+                    options['heuristic'] = heuristic
+                result = solver.Solver(*puzzle).solve(algorithm, **options)
+                self.assertFalse(result.is_solved(), (algorithm, heuristic))
+
+
+class MidGameTest(unittest.TestCase):
+    def test_plans_from_a_game_under_way(self):
+        for seed in range(4):
+            for opening in (1, 2, 3):
+                dim = 10
+                knight, pawns = solver.generate_starting_locations(dim, 4, random.Random(seed))
+                pawns_left = play(dim, knight, pawns.values(), wander(knight, opening, seed))
+                if not pawns_left:
+                    continue
+                described = solver.describe_pawns(pawns_left)
+                for algorithm in (solver.BFS, solver.ASTAR):
+                    result = solver.Solver(dim, knight.get_position(), described).solve(algorithm)
+                    self.assertTrue(result.is_solved(), (seed, opening, algorithm))
+                    self.assertEqual(replay(dim, knight.get_position(), described, result.moves), [])
+                # The game's own pawns, some of them on their way back, end up caught as well
+                self.assertEqual(play(dim, knight, pawns_left, result.moves), [], (seed, opening))
+
+    def test_pawns_on_their_way_back_turn_around(self):
+        pawn = Pawn(4, 5, 10, LEFT)
+        pawn.move(10)
+        self.assertEqual(solver.describe_pawns([pawn]), [(3, 5, RIGHT)])
+
+
+def wander(knight, moves, seed):
+    """moves valid knight moves from where knight stands, without moving it"""
+    position = knight.get_position()
+    path = []
+    choices = random.Random(seed)
+    for i in range(moves):
+        position = choices.choice(sorted(Knight(position[0], position[1], knight.dim).get_valid_moves()))
+        path.append(position)
+    return path
+
+
+class H4Test(unittest.TestCase):
+    """h4 is a lower bound, A* with it finds plans as short as BFS does"""
+
+    def test_astar_with_h4_is_as_short_as_bfs(self):
+        for seed in range(4):
+            puzzle = seeded_puzzle(10, 4, seed)
+            result = solver.Solver(*puzzle).solve(solver.ASTAR, heuristic='h4')
+            self.assertEqual(len(result), shortest_length(puzzle), seed)
+
+    def test_one_landing_catches_two_pawns(self):
+        puzzle = (8, (6, 5), [(3, 4, 1), (3, 5, 1)])
+        self.assertEqual(shortest_length(puzzle), 3)
+        self.assertEqual(len(solver.Solver(*puzzle).solve(solver.ASTAR, heuristic='h4')), 3)
+
+    def test_unreachable_pawn_is_out_of_reach(self):
+        h4_solver = solver.Solver(8, (3, 3), [(0, 2, 1), (4, 5, 1)])
+        pawns = frozenset(h4_solver.pawns_on_the_board)
+        self.assertEqual(h4_solver.h4(h4_solver.knight_id, None, None, pawns), sys.maxint)
+
+
+class IdaStarTest(unittest.TestCase):
+    def test_plans_are_as_short_as_bfs(self):
+        for seed in range(4):
+            puzzle = seeded_puzzle(10, 4, seed)
+            result = solver.Solver(*puzzle).solve(solver.IDASTAR, heuristic='h4')
+            self.assertEqual(len(result), shortest_length(puzzle), seed)
+
+    def test_pawn_state_caches_stay_bounded(self):
+        cache_size = solver.PAWN_STATE_CACHE_SIZE
+        solver.PAWN_STATE_CACHE_SIZE = 4
+        try:
+            ida_solver = solver.Solver(*seeded_puzzle(12, 6, 1), vectorized=False)
+            self.assertTrue(ida_solver.solve(solver.IDASTAR, heuristic='h4').is_solved())
+            self.assertTrue(len(ida_solver._mask_to_pawns) <= 4)
+            self.assertTrue(len(ida_solver._pawns_to_mask) <= 4)
+        finally:
+            solver.PAWN_STATE_CACHE_SIZE = cache_size
+
+
+class AnytimeTest(unittest.TestCase):
+    def test_plans_get_shorter_down_to_bfs(self):
+        for seed in range(3):
+            puzzle = seeded_puzzle(12, 5, seed)
+            lengths = [len(result) for result in solver.Solver(*puzzle).improve_solutions()]
+            self.assertEqual(lengths, sorted(set(lengths), reverse=True), seed)
+            self.assertEqual(lengths[-1], shortest_length(puzzle), seed)
+
+    def test_first_plan_comes_from_h1(self):
+        puzzle = seeded_puzzle(16, 8, 1)
+        quick = next(solver.Solver(*puzzle).improve_solutions())
+        h4_only = next(solver.Solver(*puzzle).improve_solutions(first_heuristic=None))
+        self.assertEqual(replay(puzzle[0], puzzle[1], puzzle[2], quick.moves), [])
+        self.assertTrue(quick.stats.nodes_opened * 10 < h4_only.stats.nodes_opened,
+                        (quick.stats.nodes_opened, h4_only.stats.nodes_opened))
+
+
+if __name__ == '__main__':
+    unittest.main()
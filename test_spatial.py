@@ -0,0 +1,60 @@
+import random
+import unittest
+
+import solver
+from test_solver import seeded_puzzle
+
+
+class PawnIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.solver = solver.Solver(*seeded_puzzle(20, 24, 0), vectorized=False, spatial=True)
+        self.index = self.solver.pawn_index
+        self.squares = sorted(self.solver.int_to_coord_mappings)
+        self.choices = random.Random(0)
+
+    def random_states(self, count):
+        pawns = len(self.solver.pawns_on_the_board)
+        for i in range(count):
+            yield self.choices.choice(self.squares), self.choices.randrange(1, 1 << pawns)
+
+    def test_quadrants_match_the_pawn_lists(self):
+        for position, pawn_state in self.random_states(100):
+            children = self.solver.move_table.neighbours[position]
+            pawns_alive = self.solver._pawn_ids(pawn_state)
+            qpawns, qmoves = self.solver.quadrantize(self.solver.int_to_coord_mappings[position], pawns_alive,
+                                                     children)
+            index_qpawns, index_qmoves = self.index.quadrantize(position, pawn_state, children)
+            self.assertEqual(index_qmoves, qmoves)
+            for quadrant in (1, 2, 3, 4):
+                self.assertEqual(len(index_qpawns[quadrant]), len(qpawns[quadrant]), (position, quadrant))
+
+    def test_nearest_pawn_matches_a_scan(self):
+        for square, pawn_state in self.random_states(100):
+            pawns_alive = self.solver._pawn_ids(pawn_state)
+            self.assertAlmostEqual(self.index.nearest_distance(square, pawn_state),
+                                   self.solver.get_nearest_distance(pawns_alive, square))
+
+    def test_nearest_knight_distance_matches_a_scan(self):
+        distance_table = self.solver.distance_table
+        for square, pawn_state in self.random_states(100):
+            distances = [distance_table.distances_to(pawn_square)[square]
+                         for pawn in self.solver._pawn_ids(pawn_state)
+                         for pawn_square in self.solver.pawn_squares[pawn]]
+            reachable = [distance for distance in distances if distance != solver.UNREACHABLE]
+            self.assertEqual(self.index.nearest_knight_distance(square, pawn_state),
+                             min(reachable) if reachable else None)
+
+    def test_only_quadrant_heuristics_use_the_index(self):
+        self.assertFalse(solver.NO_QUADRANT_HEURISTICS & self.index.HEURISTICS)
+
+    def test_plans_do_not_change(self):
+        puzzle = seeded_puzzle(12, 6, 1)
+        for heuristic in ('h1', 'h2', 'h4'):
+            plain = solver.Solver(*puzzle, vectorized=False, spatial=False).solve(solver.ASTAR, heuristic=heuristic)
+            indexed = solver.Solver(*puzzle, vectorized=False, spatial=True).solve(solver.ASTAR, heuristic=heuristic)
+            self.assertEqual(indexed.moves, plain.moves, heuristic)
+            self.assertEqual(indexed.stats.nodes_opened, plain.stats.nodes_opened, heuristic)
+
+
+if __name__ == '__main__':
+    unittest.main()
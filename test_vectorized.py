@@ -0,0 +1,67 @@
+import random
+import unittest
+
+try:
+    import numpy
+    import vectorized
+except ImportError:
+    numpy = None
+
+import solver
+from test_solver import seeded_puzzle
+
+
+def scalar_estimates(scalar_solver, heuristic, position, pawn_state):
+    """What the pure Python heuristic says for every child of position"""
+    h = getattr(scalar_solver, heuristic)
+    children = scalar_solver.move_table.neighbours[position]
+    pawns_alive = scalar_solver._pawn_ids(pawn_state)
+    qpawns, qmoves = scalar_solver.quadrantize(scalar_solver.int_to_coord_mappings[position], pawns_alive,
+                                               children)
+    return [h(child, qpawns, qmoves, pawns_alive) for child in children]
+
+
+@unittest.skipIf(numpy is None, "needs numpy")
+class BatchHeuristicsTest(unittest.TestCase):
+    def assert_same_estimates(self, puzzle, **settings):
+        scalar_solver = solver.Solver(*puzzle, vectorized=False, spatial=False, **settings)
+        batch_solver = solver.Solver(*puzzle, vectorized=True, spatial=False, **settings)
+        choices = random.Random(0)
+        number_of_pawns = len(scalar_solver.pawns_on_the_board)
+        for i in range(40):
+            position = choices.choice(sorted(scalar_solver.int_to_coord_mappings))
+            pawn_state = choices.randrange(1, 1 << number_of_pawns)
+            children = scalar_solver.move_table.neighbours[position]
+            for heuristic in ('h1', 'h2', 'h4'):
+                expected = scalar_estimates(scalar_solver, heuristic, position, pawn_state)
+                estimates = batch_solver.batch_heuristics.estimate(heuristic, position, children, pawn_state)
+                self.assertTrue(numpy.allclose(estimates, expected), (heuristic, position, pawn_state))
+
+    def test_estimates_match_the_pure_python_heuristics(self):
+        for seed in range(3):
+            self.assert_same_estimates(seeded_puzzle(12, 6, seed))
+
+    def test_estimates_match_with_knight_distances(self):
+        self.assert_same_estimates(seeded_puzzle(12, 6, 0), knight_distance=True)
+
+    def test_plans_do_not_change(self):
+        for seed in range(3):
+            puzzle = seeded_puzzle(12, 6, seed)
+            for heuristic in ('h1', 'h4'):
+                plain = solver.Solver(*puzzle, vectorized=False).solve(solver.ASTAR, heuristic=heuristic)
+                batched = solver.Solver(*puzzle, vectorized=True).solve(solver.ASTAR, heuristic=heuristic)
+                self.assertEqual(batched.moves, plain.moves, (seed, heuristic))
+
+    def test_alive_cache_stays_bounded(self):
+        cache_size = vectorized.ALIVE_CACHE_SIZE
+        vectorized.ALIVE_CACHE_SIZE = 4
+        try:
+            batch_solver = solver.Solver(*seeded_puzzle(12, 6, 1), vectorized=True)
+            self.assertTrue(batch_solver.solve(solver.ASTAR, heuristic='h4').is_solved())
+            self.assertTrue(len(batch_solver.batch_heuristics._alive) <= 4)
+        finally:
+            vectorized.ALIVE_CACHE_SIZE = cache_size
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""NumPy versions of the A* heuristics, scoring all the children of a node in one go.
+
+BatchHeuristics.estimate gives, child for child, the same numbers h1, h2 and h4 of solver.Solver
+do, so a search runs the same with either; only the cost of getting there changes.
+"""
+import sys
+
+import numpy as np
+
+MAXINT = float(sys.maxint)
+# Pawn states whose arrays are kept, past that they are dropped and built again as needed
+ALIVE_CACHE_SIZE = 4096
+
+
+class BatchHeuristics(object):
+    """Per puzzle arrays the batched heuristics read from, built once per Solver.
+
+    @param solver: the solver.Solver whose heuristics to compute
+    """
+
+    # The heuristics that have a batched version, with the number of pawns from which it beats
+    # the pure Python one. Below that the fixed cost of the NumPy calls is more than the loops they save.
+    MIN_PAWNS = {'h1': 48, 'h2': 48, 'h4': 8}
+    # Looking distances up in the distance table is where the pure Python heuristics are slowest
+    KNIGHT_DISTANCE_MIN_PAWNS = 8
+    # Where the solver has a spatial index (spatial.py), it answers these faster than a batch does
+    SPATIAL_HEURISTICS = ('h1', 'h2')
+
+    def __init__(self, solver, always=False):
+        """@param always: use the batched heuristics whatever the number of pawns"""
+        self.solver = solver
+        number_of_pawns = len(solver.pawns_on_the_board)
+        self.heuristics = frozenset(
+            heuristic for heuristic, min_pawns in self.MIN_PAWNS.items()
+            if always or (heuristic not in self.SPATIAL_HEURISTICS or solver.pawn_index is None) and
+            (number_of_pawns >= min_pawns or
+             solver.knight_distance and number_of_pawns >= self.KNIGHT_DISTANCE_MIN_PAWNS))
+        size = solver.move_table.size
+        self.square_x = np.zeros(size, dtype=np.int64)
+        self.square_y = np.zeros(size, dtype=np.int64)
+        for square, (x, y) in solver.int_to_coord_mappings.items():
+            self.square_x[square] = x
+            self.square_y[square] = y
+
+        # Pawns are known by their index in pawns_on_the_board here, like their bit in a bitmask
+        self.pawn_index = dict((pawn, index) for index, pawn in enumerate(solver.pawns_on_the_board))
+        self.pawn_ids = np.array(solver.pawns_on_the_board, dtype=np.int64)
+        self.pawn_x = self.square_x[self.pawn_ids]
+        self.pawn_y = self.square_y[self.pawn_ids]
+        # The first pawn h1 and h2 look at on a square, -1 when there is none
+        self.first_pawn = np.full(size, -1, dtype=np.int64)
+        for square, pawns_at_square in solver.pawn_int_possible_locations_mapping.items():
+            self.first_pawn[square] = self.pawn_index[pawns_at_square[0]]
+        self._alive = dict()
+        self._knight_distances = None
+
+    def alive_pawns(self, pawns_alive):
+        """Returns (indices, x, y, flags) of the pawns alive in a pawn state, a bitmask or a set.
+
+        flags has a slot for every pawn, True for the ones alive, and one more, always False, that
+        the -1 of first_pawn lands on.
+        """
+        alive = self._alive.get(pawns_alive)
+        if alive is None:
+            if len(self._alive) >= ALIVE_CACHE_SIZE:
+                self._alive.clear()
+            if self.solver.bitmask:
+                indices = [i for i in range(len(self.pawn_ids)) if pawns_alive >> i & 1]
+            else:
+                indices = sorted(self.pawn_index[pawn] for pawn in pawns_alive)
+            indices = np.array(indices, dtype=np.int64)
+            flags = np.zeros(len(self.pawn_ids) + 1, dtype=bool)
+            flags[indices] = True
+            alive = (indices, self.pawn_x[indices], self.pawn_y[indices], flags)
+            self._alive[pawns_alive] = alive
+        return alive
+
+    def knight_distances(self):
+        """Knight moves from every square (rows) to the nearer square of every pawn (columns), inf if unreachable"""
+        if self._knight_distances is None:
+            distance_table = self.solver.distance_table
+            columns = []
+            for pawn in self.solver.pawns_on_the_board:
+                rows = [np.frombuffer(distance_table.distances_to(square), dtype=np.int32)
+                        for square in self.solver.pawn_squares[pawn]]
+                nearest = np.minimum.reduce([np.where(row < 0, np.inf, row) for row in rows])
+                columns.append(nearest)
+            self._knight_distances = np.column_stack(columns)
+        return self._knight_distances
+
+    def estimate(self, heuristic, position, children, pawns_alive):
+        """Returns the estimate of heuristic for every square in children, a knight on position
+
+        Estimates are floats, sys.maxint where the scalar heuristic says sys.maxint.
+        """
+        children = np.asarray(children, dtype=np.int64)
+        alive, pawn_x, pawn_y, alive_flags = self.alive_pawns(pawns_alive)
+        solver = self.solver
+
+        if heuristic == 'h4':
+            distances = self.knight_distances()[children][:, alive]
+            landings = (len(alive) + solver.max_catch - 1) // solver.max_catch
+            estimates = np.maximum(distances.max(axis=1), distances.min(axis=1) + (landings - 1))
+            return np.where(estimates == np.inf, MAXINT, estimates)
+
+        px = self.square_x[position]
+        py = self.square_y[position]
+        child_x = self.square_x[children]
+        child_y = self.square_y[children]
+
+        # Children down the rows, the pawns alive across
+        in_quadrant = _quadrants(child_x, child_y, px, py)[:, None] == _quadrants(pawn_x, pawn_y, px, py)[None, :]
+        pawns_in_quadrant = in_quadrant.sum(axis=1)
+        if solver.knight_distance:
+            distances = self.knight_distances()[children][:, alive]
+        else:
+            dx = pawn_x[None, :] - child_x[:, None]
+            dy = pawn_y[None, :] - child_y[:, None]
+            distances = np.sqrt(dx * dx + dy * dy)
+        nearest = np.where(in_quadrant, distances, np.inf).min(axis=1)
+
+        if heuristic == 'h1':
+            estimates = len(alive) * solver.scale + nearest + pawns_in_quadrant
+        else:
+            estimates = len(alive) * solver.scale + nearest
+
+        estimates[alive_flags[self.first_pawn[children]]] = 0.0
+        estimates[pawns_in_quadrant == 0] = MAXINT
+        return estimates
+
+
+def _quadrants(x, y, px, py):
+    """Solver.quadrantize's quadrant for every (x, y) around (px, py)"""
+    above = y >= py
+    return np.where(above, np.where(x >= px, 1, 2), np.where(x <= px, 3, 4))
@@ -1,20 +1,48 @@
+import copy
+import multiprocessing
 import threading
+import traceback
 import wx
 import time
+from Queue import Empty
 
-myEVT_MAKE_MOVE = wx.NewEventType()
-EVT_MAKE_MOVE = wx.PyEventBinder(myEVT_MAKE_MOVE, 1)
-myEVT_PAWN_MOVE = wx.NewEventType()
-EVT_PAWN_MOVE = wx.PyEventBinder(myEVT_PAWN_MOVE, 1)
+import cache
+import solver
+
+myEVT_PLAY_STEPS = wx.NewEventType()
+EVT_PLAY_STEPS = wx.PyEventBinder(myEVT_PLAY_STEPS, 1)
+myEVT_SOLUTION_FOUND = wx.NewEventType()
+EVT_SOLUTION_FOUND = wx.PyEventBinder(myEVT_SOLUTION_FOUND, 1)
+myEVT_SEARCH_DONE = wx.NewEventType()
+EVT_SEARCH_DONE = wx.PyEventBinder(myEVT_SEARCH_DONE, 1)
+myEVT_SEARCH_PROGRESS = wx.NewEventType()
+EVT_SEARCH_PROGRESS = wx.PyEventBinder(myEVT_SEARCH_PROGRESS, 1)
+
+# The step of a replay where the pawns move, the other steps are the squares the knight moves to
+PAWNS_STEP = None
+# Seconds between a knight move and the pawns moving, and on to the next knight move, at speed 1
+PLAYBACK_STEP_SECONDS = 0.5
+# Steps falling due closer together than this are posted as one event, so drawn once
+PLAYBACK_FRAME_SECONDS = 1 / 30.0
+
+# How often, in expanded nodes, a background search looks at the clock and for a cancel
+PROGRESS_CHECK_INTERVAL = 1000
+# Least time between two progress events of a background search
+PROGRESS_SECONDS = 0.25
+# How long a cancelled search process gets to stop on its own before it is terminated
+CANCEL_GRACE_SECONDS = 1.0
 
 
 class MoveEvent(wx.PyCommandEvent):
     """Event to signal that a new move is ready"""
 
-    def __init__(self, etype, eid, value=None):
-        """Creates the event object"""
+    def __init__(self, etype, eid, value=None, game=None):
+        """Creates the event object
+        @param game: the game the thread posting the event was started for
+        """
         wx.PyCommandEvent.__init__(self, etype, eid)
         self._value = value
+        self._game = game
 
     def get_value(self):
         """Returns the value from the event.
@@ -23,36 +51,213 @@ class MoveEvent(wx.PyCommandEvent):
         """
         return self._value
 
+    def get_game(self):
+        return self._game
+
 
 class ComputerPlayer(threading.Thread):
-    def __init__(self, parent, value, canvas, mapping):
-        """
+    def __init__(self, parent, moves, canvas, speed=1.0, game=None):
+        """Replays moves on the board of parent, posting the steps as EVT_PLAY_STEPS events.
+
+        The value of an event is a list of steps to play in order: a board square to move the
+        knight to, or PAWNS_STEP for the pawns' turn. Played fast, the steps of one frame share an event.
         @param parent: The gui object that should receive the value
-        @param value: value to 'calculate' to
+        @param moves: the (x, y) squares the knight visits, in order
+        @param canvas: the board squares, keyed by their point
+        @param speed: how many times faster than one step every PLAYBACK_STEP_SECONDS to play
+        @param game: passed on with every event, see MoveEvent
         """
         threading.Thread.__init__(self)
+        self.daemon = True
         self._parent = parent
-        self._goal_node = value
-        self.int_to_coord_mappings = mapping
+        self._game = game
+        self._moves = moves
         self.boardCanvasSquares = canvas
+        self._speed = speed
+        self._jump = False
+        self._stopped = False
+        # Set to cut the wait for the next step short
+        self._wake = threading.Event()
+
+    def set_speed(self, speed):
+        self._speed = speed
+        self._wake.set()
+
+    def jump_to_end(self):
+        """Plays all the steps left at once"""
+        self._jump = True
+        self._wake.set()
+
+    def stop(self):
+        """Plays no more steps"""
+        self._stopped = True
+        self._wake.set()
 
     def run(self):
         """Overrides Thread.run. Don't call this directly its called internally
         when you call Thread.start().
         """
         print "spawned AI player"
-        node_search = self._goal_node
-        move_list = []
-        while node_search.parent is not None:
-            coord = self.int_to_coord_mappings[node_search.path_id]
-            square = self.boardCanvasSquares[coord]
-            move_list.append(square)
-            node_search = node_search.parent
-
-        for i in range(len(move_list) - 1):
-            time.sleep(0.5)
-            evt = MoveEvent(myEVT_MAKE_MOVE, -1, move_list.pop())
-            wx.PostEvent(self._parent, evt)
-            time.sleep(0.5)
-            evt2 = MoveEvent(myEVT_PAWN_MOVE, -1, None)
-            wx.PostEvent(self._parent, evt2)
+        steps = []
+        for coord in self._moves:
+            steps.append(self.boardCanvasSquares[coord])
+            steps.append(PAWNS_STEP)
+        played = 0
+        while played < len(steps) and not self._stopped:
+            if self._jump:
+                batch = len(steps) - played
+            else:
+                interval = PLAYBACK_STEP_SECONDS / self._speed
+                batch = max(1, int(PLAYBACK_FRAME_SECONDS / interval))
+                if self._wake.wait(interval * batch):
+                    # Woken by a new speed, a jump or a stop: start over with it
+                    self._wake.clear()
+                    continue
+            wx.PostEvent(self._parent, MoveEvent(myEVT_PLAY_STEPS, -1, steps[played:played + batch], self._game))
+            played += batch
+
+
+class SearchDeadline(Exception):
+    pass
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class SearchProgress(object):
+    """What a background search reports while it runs, the value of an EVT_SEARCH_PROGRESS"""
+
+    def __init__(self, algorithm, stats, elapsed):
+        self.algorithm = algorithm
+        self.nodes_opened = stats.nodes_opened
+        self.frontier_size = stats.frontier_size
+        self.max_depth = stats.max_depth
+        self.elapsed = elapsed
+
+
+class BackgroundSearch(threading.Thread):
+    def __init__(self, parent, dim, knight, pawns, algorithm, cache_path=None, game=None, seconds=None, **options):
+        """Runs solver.solve in a process of its own, so the event loop of parent goes on.
+
+        A SearchProgress is posted to parent as an EVT_SEARCH_PROGRESS at most every
+        PROGRESS_SECONDS, and the SearchResult as an EVT_SEARCH_DONE at the end, None if the
+        search was cancelled or failed.
+
+        solver.ANYTIME runs Solver.improve_solutions instead, posting every shorter plan as an
+        EVT_SOLUTION_FOUND, and the best one (or None) as the EVT_SEARCH_DONE once it is out of
+        plans or time, or cancelled.
+        @param cache_path: the file of the cache.SolutionCache to look the puzzle up in, None for none.
+                           The anytime search does not use it.
+        @param game: passed on with every event, see MoveEvent
+        @param seconds: how long the anytime search may improve on its first plan, None for until it
+                        has the shortest. Until there is a first plan it only stops when cancelled.
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._parent = parent
+        self._game = game
+        self._args = (dim, knight, pawns, algorithm, cache_path, seconds, options)
+        self._cancelled = multiprocessing.Event()
+
+    def cancel(self):
+        """Asks the search to stop, it posts EVT_SEARCH_DONE once it has"""
+        self._cancelled.set()
+
+    def run(self):
+        messages = multiprocessing.Queue()
+        # Not a daemon: the HDA* search starts worker processes of its own
+        process = multiprocessing.Process(target=_run_search, args=self._args + (messages, self._cancelled))
+        process.start()
+        result = None
+        cancelled_at = None
+        while True:
+            try:
+                kind, value = messages.get(timeout=PROGRESS_SECONDS)
+            except Empty:
+                if process.is_alive():
+                    if self._cancelled.is_set():
+                        cancelled_at = cancelled_at or time.time()
+                        if time.time() - cancelled_at > CANCEL_GRACE_SECONDS:
+                            process.terminate()
+                            break
+                    continue
+                # The last messages can still be on their way through the pipe when the process is gone
+                try:
+                    kind, value = messages.get_nowait()
+                except Empty:
+                    print "The search process ended without an answer"
+                    break
+            if kind == 'progress':
+                wx.PostEvent(self._parent, MoveEvent(myEVT_SEARCH_PROGRESS, -1, value, self._game))
+                continue
+            if kind == 'solution':
+                wx.PostEvent(self._parent, MoveEvent(myEVT_SOLUTION_FOUND, -1, value, self._game))
+                continue
+            if kind == 'done':
+                result = value
+            elif kind == 'error':
+                print value
+            break
+        process.join()
+        wx.PostEvent(self._parent, MoveEvent(myEVT_SEARCH_DONE, -1, result, self._game))
+
+
+def _run_search(dim, knight, pawns, algorithm, cache_path, seconds, options, messages, cancelled):
+    """Body of the BackgroundSearch process, tells messages about progress and the result"""
+    started = time.time()
+    last_report = [started]
+    # When the anytime search stops improving, set once it has a plan
+    deadline = [None]
+
+    def report(stats):
+        if cancelled.is_set():
+            raise SearchCancelled()
+        now = time.time()
+        if deadline[0] is not None and now > deadline[0]:
+            raise SearchDeadline()
+        if now - last_report[0] >= PROGRESS_SECONDS:
+            last_report[0] = now
+            messages.put(('progress', SearchProgress(algorithm, stats, now - started)))
+
+    stats = solver.SearchStats(callback=report, callback_interval=PROGRESS_CHECK_INTERVAL)
+    if algorithm == solver.ANYTIME:
+        best = None
+        try:
+            for best in solver.Solver(dim, knight, pawns).improve_solutions(stats=stats, **options):
+                if deadline[0] is None and seconds is not None:
+                    deadline[0] = time.time() + seconds
+                messages.put(('solution', _portable(best)))
+        except (SearchCancelled, SearchDeadline):
+            pass
+        except Exception:
+            messages.put(('error', traceback.format_exc()))
+            return
+        messages.put(('done', _portable(best) if best is not None else None))
+        return
+
+    search_cache = cache.SolutionCache(cache_path) if cache_path else None
+    try:
+        result = solver.solve(dim, knight, pawns, algorithm, stats=stats, cache=search_cache, **options)
+    except SearchCancelled:
+        messages.put(('cancelled', None))
+        return
+    except Exception:
+        messages.put(('error', traceback.format_exc()))
+        return
+    finally:
+        if search_cache is not None:
+            search_cache.close()
+    messages.put(('done', _portable(result)))
+
+
+def _portable(result):
+    """A copy of result that can go through a queue.
+
+    The node chain and the callback stay in this process, the moves are all the game needs.
+    """
+    result = copy.copy(result)
+    result.goal_node = None
+    result.stats = copy.copy(result.stats)
+    result.stats.callback = None
+    return result
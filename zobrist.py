@@ -0,0 +1,55 @@
+"""Zobrist keys for the states of a search.
+
+Every square and every pawn gets a random word. The key of a state (knight square, pawns alive) is
+the word of the square XORed with the words of the pawns, so a move changes it with a few XORs
+instead of hashing the whole state again: the word of the square left, the word of the square
+reached and the words of the pawns caught.
+
+The words come from a fixed seed, the key of a state is the same in every process and every run,
+which is what lets parallel.py pick the worker owning a state from its key.
+"""
+import random
+
+# Any fixed number does, it only has to be the same everywhere
+SEED = 1237
+# Python 2 ints are 64 bit words with a sign, 63 bits keep every XOR off long arithmetic
+WORD_BITS = 63
+
+
+class ZobristKeys(object):
+    """The words of the squares and pawns of a solver.Solver, in either of its pawn state modes"""
+
+    def __init__(self, solver, seed=SEED):
+        rng = random.Random(seed)
+        self.squares = [rng.getrandbits(WORD_BITS) for i in range(solver.move_table.size)]
+        # Pawns are known by the square id they start on, or by their bit in a bitmask
+        self.pawn_words = [rng.getrandbits(WORD_BITS) for pawn in solver.pawns_on_the_board]
+        self.pawns = dict(zip(solver.pawns_on_the_board, self.pawn_words))
+        self.bitmask = solver.bitmask
+        self._pawn_keys = {0: 0, frozenset(): 0}
+
+    def pawns_key(self, pawns):
+        """The XOR of the words of the pawns in a pawn state"""
+        key = self._pawn_keys.get(pawns)
+        if key is None:
+            key = 0
+            if self.bitmask:
+                for bit, word in enumerate(self.pawn_words):
+                    if pawns >> bit & 1:
+                        key ^= word
+            else:
+                for pawn in pawns:
+                    key ^= self.pawns[pawn]
+            self._pawn_keys[pawns] = key
+        return key
+
+    def key(self, square, pawns):
+        """The key of the state with the knight on square and pawns alive, from scratch"""
+        return self.squares[square] ^ self.pawns_key(pawns)
+
+    def move_key(self, key, source, caught):
+        """The key of a state with the knight taken off source and the caught pawns gone.
+
+        XOR in the word of the square the knight goes to, to get the key of a child state.
+        """
+        return key ^ self.squares[source] ^ self.pawns_key(caught)